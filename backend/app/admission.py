@@ -0,0 +1,198 @@
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Collection
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed; ``reason`` is ``rate_limited`` or ``overloaded``"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now: float, cost: float = 1) -> float:
+        """Consume ``cost`` tokens; returns 0 on success, else seconds until they are available.
+
+        A cost above ``burst`` needs a full bucket and leaves it in debt, so
+        the client still pays for every token at the refill rate.
+        """
+        self._refill(now)
+        needed = min(cost, self.burst)
+        if self.tokens >= needed:
+            self.tokens -= cost
+            return 0.0
+        return (needed - self.tokens) / self.rate
+
+    def charge(self, now: float, cost: float):
+        """Consume ``cost`` tokens for work already done, going into debt if need be"""
+        self._refill(now)
+        self.tokens -= cost
+
+
+class RateLimiter:
+    """Per-client token buckets, kept in a bounded LRU so idle clients cost nothing"""
+
+    def __init__(self, per_minute: float, burst: int, max_clients: int = 10000, clock=time.monotonic):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.max_clients = max_clients
+        self._clock = clock
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _bucket(self, client_key: str, now: float) -> TokenBucket:
+        bucket = self._buckets.get(client_key)
+        if bucket is None:
+            bucket = self._buckets[client_key] = TokenBucket(self.rate, self.burst, now)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client_key)
+        return bucket
+
+    def check(self, client_key: str, cost: float = 1):
+        now = self._clock()
+        with self._lock:
+            wait = self._bucket(client_key, now).take(now, cost)
+        if wait:
+            raise AdmissionRejected("rate_limited", wait)
+
+    def charge(self, client_key: str, cost: float):
+        """Bill work that was not known up front; never rejects"""
+        now = self._clock()
+        with self._lock:
+            self._bucket(client_key, now).charge(now, cost)
+
+
+class ConcurrencyLimiter:
+    """Global cap on in-flight agent requests with a bounded, latency-budgeted queue.
+
+    Requests that would queue behind ``max_queue`` others, or whose predicted
+    wait exceeds ``queue_timeout``, are rejected immediately instead of timing
+    out later; that keeps p99 bounded under overload.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        # Moving average of agent service time, used to predict queueing delay
+        self.service_time = 0.0
+        self._waiters: "deque[asyncio.Future]" = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def _retry_after(self) -> float:
+        return self.service_time * (self.waiting / self.max_concurrency + 1)
+
+    async def _acquire(self):
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            return
+        predicted_wait = self.service_time * (self.waiting + 1) / self.max_concurrency
+        if self.waiting >= self.max_queue or predicted_wait > self.queue_timeout:
+            raise AdmissionRejected("overloaded", self._retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # A released slot is handed to the waiter directly (see _release)
+            await asyncio.wait_for(waiter, timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise AdmissionRejected("overloaded", self._retry_after())
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just before the caller went away
+                self._release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def _release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        await self._acquire()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            self.service_time = elapsed if not self.service_time else 0.8 * self.service_time + 0.2 * elapsed
+            self._release()
+
+
+class AdmissionController:
+    """Rate limiting per client plus a global concurrency cap for agent work"""
+
+    def __init__(self, per_minute: float, burst: int, max_concurrency: int, max_queue: int,
+                 queue_timeout: float, max_clients: int = 10000, enabled: bool = True):
+        self.enabled = enabled
+        self.rate_limiter = RateLimiter(per_minute, burst, max_clients)
+        self.concurrency = ConcurrencyLimiter(max_concurrency, max_queue, queue_timeout)
+
+    @asynccontextmanager
+    async def admit(self, client_key: str, cost: float = 1):
+        """Hold an agent slot for ``client_key`` or raise ``AdmissionRejected``.
+
+        ``cost`` is the number of LLM calls the request will make.
+        """
+        if not self.enabled:
+            yield
+            return
+        self.rate_limiter.check(client_key, cost)
+        async with self.concurrency.slot():
+            yield
+
+    def charge(self, client_key: str, cost: float):
+        """Bill ``client_key`` for LLM calls made beyond what ``admit`` charged"""
+        if self.enabled:
+            self.rate_limiter.charge(client_key, cost)
+
+
+def client_key(headers, client, trust_forwarded_for: bool = False, api_keys: Collection[str] = ()) -> str:
+    """Identify the caller by a known API key, else by (optionally proxied) IP address.
+
+    Unknown ``X-API-Key`` values are ignored; otherwise a client could mint a
+    fresh rate-limit bucket per request.
+    """
+    api_key = headers.get("x-api-key")
+    if api_key and api_key in api_keys:
+        return f"key:{api_key}"
+    if trust_forwarded_for:
+        # Only the last entry, appended by our proxy, is not under the client's control
+        forwarded = headers.get("x-forwarded-for")
+        if forwarded and forwarded.split(",")[-1].strip():
+            return f"ip:{forwarded.split(',')[-1].strip()}"
+    return f"ip:{client.host if client else 'unknown'}"
@@ -0,0 +1,176 @@
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional, Tuple
+import re
+import threading
+
+ORDINALS = {
+    "first": 1, "second": 2, "third": 3, "fourth": 4, "fifth": 5,
+    "sixth": 6, "seventh": 7, "eighth": 8, "ninth": 9, "tenth": 10,
+    "last": -1,
+}
+
+# "the second one", "2nd task", "the last one"
+_POSITION_RE = re.compile(
+    r"\b(?P<word>" + "|".join(ORDINALS) + r")\b"
+    r"|\b(?P<nth>\d+)(?:st|nd|rd|th)\b"
+)
+# "it", "that one", "that task": the task the conversation last touched
+_PRONOUN_RE = re.compile(r"\b(?:it|that one|that task|this one|this task)\b")
+
+# Commands that can be executed directly once the task is known
+_FOLLOW_UP_ACTIONS: List[Tuple[str, re.Pattern]] = [
+    ("delete", re.compile(r"\b(?:delete|remove|drop)\b")),
+    ("completed", re.compile(r"\b(?:done|complete|completed|finish|finished)\b")),
+    ("in_progress", re.compile(r"\b(?:start|started|in progress)\b")),
+    ("pending", re.compile(r"\b(?:pending|reopen|undo)\b")),
+    ("cancelled", re.compile(r"\bcancel(?:led)?\b")),
+]
+# New tasks are never follow-ups, even if they mention "it" ("remind me to finish it")
+_CREATE_RE = re.compile(r"\b(?:create|add|new task|remind me)\b")
+# Questions ("should I delete it?") and negations ("don't delete it") are left to the LLM
+_QUESTION_RE = re.compile(
+    r"\?\s*$|^\W*(?:should|shall|is|are|was|were|do|does|did|can|could|would|will|have|has"
+    r"|what|which|who|why|how|when|where)\b"
+)
+_NEGATION_RE = re.compile(r"n['’]t\b|\b(?:not|never)\b")
+# Besides its action and reference a follow-up may only contain these; any other
+# word ("delete the first draft", "the 2nd quarter report") belongs to a title
+_FILLER_RE = re.compile(
+    r"\b(?:please|actually|ok|okay|now|then|also|just|and|mark|set|move|make|as|to|the|one|task|item)\b"
+)
+
+THIS = 0
+
+
+def parse_follow_up(message: str) -> Optional[Tuple[str, int]]:
+    """Return ``(action, position)`` for commands like "mark the second one done".
+
+    ``position`` is 1-based, ``-1`` for "last" and ``0`` for "it"/"that one".
+    Returns ``None`` unless the message has both a known action and a reference
+    and nothing else that could name a task, and for questions and negations.
+    """
+    text = message.lower()
+    if _CREATE_RE.search(text) or _QUESTION_RE.search(text) or _NEGATION_RE.search(text):
+        return None
+    action = next((name for name, pattern in _FOLLOW_UP_ACTIONS if pattern.search(text)), None)
+    if action is None:
+        return None
+
+    rest = text
+    for pattern in [_POSITION_RE, _PRONOUN_RE] + [pattern for _, pattern in _FOLLOW_UP_ACTIONS] + [_FILLER_RE]:
+        rest = pattern.sub(" ", rest)
+    if re.search(r"\w", rest):
+        return None
+
+    match = _POSITION_RE.search(text)
+    if match:
+        if match.group("word"):
+            return action, ORDINALS[match.group("word")]
+        return action, int(match.group("nth"))
+    if _PRONOUN_RE.search(text):
+        return action, THIS
+    return None
+
+
+class ConversationContext:
+    """What the agent remembers about one chat session"""
+
+    def __init__(self, store: "ConversationContextStore"):
+        self._store = store
+        self.turns = deque(maxlen=store.max_turns)
+        self.listed_ids: List[int] = []
+        self.listed_count = 0  # length of the last listing; only the first max_tasks ids are kept
+        self.last_task_id: Optional[int] = None
+        self._snapshot: Optional[List[Dict[str, Any]]] = None
+        self._snapshot_key: Optional[Tuple] = None
+        self._snapshot_generation = -1
+
+    def add_turn(self, user_message: str, response: str):
+        limit = self._store.max_turn_chars
+        self.turns.append((user_message[:limit], response[:limit]))
+
+    def remember_listing(self, key: Tuple, tasks: List[Dict[str, Any]]):
+        """Record the ids the user just saw and, if small enough, a compact snapshot"""
+        max_tasks = self._store.max_tasks
+        self.listed_ids = [task["id"] for task in tasks[:max_tasks]]
+        self.listed_count = len(tasks)
+        if len(tasks) <= max_tasks:
+            self._snapshot = [
+                {field: task.get(field) for field in ("id", "title", "description", "status", "priority", "due_date")}
+                for task in tasks
+            ]
+            self._snapshot_key = key
+            self._snapshot_generation = self._store.generation
+        else:
+            self._snapshot = None
+
+    def cached_listing(self, key: Tuple) -> Optional[List[Dict[str, Any]]]:
+        """Snapshot for ``key`` if no task changed since it was taken"""
+        if self._snapshot is not None and self._snapshot_key == key \
+                and self._snapshot_generation == self._store.generation:
+            return self._snapshot
+        return None
+
+    def forget_snapshot(self):
+        """Drop the cached listing after this session changed tasks (listed ids still resolve)"""
+        self._snapshot = None
+
+    def remember_task(self, task_id: Optional[int]):
+        """Task that "it"/"that one" refers to next (``None`` after a delete)"""
+        self.last_task_id = task_id
+
+    def resolve(self, position: int) -> Optional[int]:
+        """Task id for a 1-based position in the last listing (or ``THIS``)"""
+        if position == THIS:
+            return self.last_task_id
+        if not self.listed_ids:
+            return None
+        # Positions past the kept ids ("the last one" of a long listing) are unknown
+        index = position - 1 if position > 0 else self.listed_count + position
+        if 0 <= index < len(self.listed_ids):
+            return self.listed_ids[index]
+        return None
+
+
+class ConversationContextStore:
+    """Bounded LRU of per-session conversation contexts.
+
+    Any task change bumps ``generation``, which invalidates every cached
+    listing in O(1); listed ids are kept so ordinal references still resolve.
+    """
+
+    def __init__(self, max_sessions: int = 1000, max_turns: int = 10, max_tasks: int = 50,
+                 max_turn_chars: int = 500):
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self.max_tasks = max_tasks
+        self.max_turn_chars = max_turn_chars
+        self.generation = 0
+        self._sessions: "OrderedDict[str, ConversationContext]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> ConversationContext:
+        with self._lock:
+            context = self._sessions.get(session_id)
+            if context is None:
+                context = self._sessions[session_id] = ConversationContext(self)
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(session_id)
+            return context
+
+    def discard(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def invalidate(self):
+        """Called on every task change event"""
+        with self._lock:
+            self.generation += 1
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
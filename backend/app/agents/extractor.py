@@ -0,0 +1,353 @@
+"""Local entity extraction for chat commands.
+
+All patterns are compiled once at import and match lowercased text (case
+folding in the regex engine is several times slower); ``extract`` runs a
+fixed handful of searches per message so the agent can parse titles,
+priorities, statuses, dates and task ids without asking the LLM.
+"""
+from datetime import datetime, timedelta
+from typing import Iterable, List, NamedTuple, Optional
+import calendar
+import re
+
+
+class Entities(NamedTuple):
+    intent: Optional[str]  # create, list, complete, update, delete
+    title: Optional[str]
+    priority: Optional[str]
+    status: Optional[str]
+    due_date: Optional[datetime]
+    task_id: Optional[int]
+
+
+# --- intent ---------------------------------------------------------------
+
+_INTENT_RE = re.compile(
+    r"\b(?:"
+    r"(?P<create>create|add|new task|remind me|schedule|i need to|i have to)"
+    r"|(?P<list>show|list|display|what are|what's on|which tasks|view)"
+    r"|(?P<delete>delete|remove|drop|get rid of|cancel|erase)"
+    r"|(?P<complete>mark|complete|finish|finished|done|check off|tick off)"
+    r"|(?P<update>update|change|set|rename|move|start|reopen|edit|make)"
+    r")\b",
+)
+
+# --- priority -------------------------------------------------------------
+
+_PRIORITY_WORDS = {
+    "low": "low", "medium": "medium", "normal": "medium", "high": "high",
+    "urgent": "urgent", "critical": "urgent", "top": "urgent",
+}
+_PRIORITY_RE = re.compile(
+    r"\b(?P<level>low|medium|normal|high|urgent|critical|top)[\s-]+priority\b"
+    r"|\bpriority\s*(?:is|of|to|=|:)?\s*(?P<level2>low|medium|normal|high|urgent|critical)\b"
+    r"|\bpriority\b[^.]*?\bto\s+(?P<level3>low|medium|normal|high|urgent|critical)\b"
+    r"|\b(?P<urgent>urgent(?:ly)?|asap|critical|immediately)\b"
+    r"|\b(?P<important>important)\b",
+)
+
+# --- status ---------------------------------------------------------------
+
+_STATUS_RE = re.compile(
+    r"\b(?:"
+    r"(?P<pending>not done|not finished|incomplete|pending|to-?do|reopen(?:ed)?|undo)"
+    r"|(?P<in_progress>in[\s-]progress|started|start|working on)"
+    r"|(?P<cancelled>cancel(?:l?ed)?)"
+    r"|(?P<completed>done|completed?|finished|finish)"
+    r"|(?P<removed>delete|remove)"
+    r")\b",
+)
+
+# --- task id --------------------------------------------------------------
+
+_DIGIT_RE = re.compile(r"\d")
+# "task 3 days early" is a duration, not task 3
+_TASK_ID_RE = re.compile(
+    r"\b(?:task|id)\s*(?:#|no\.?\s*|number\s+|id\s+)?(?P<id>\d+)\b"
+    r"(?!\s*(?:minutes?|mins?|hours?|hrs?|days?|weeks?|months?|years?)\b)"
+    r"|#(?P<hash>\d+)\b"
+)
+
+# --- dates ----------------------------------------------------------------
+
+_NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10, "couple of": 2, "few": 3,
+}
+_WEEKDAYS = {name: i for i, name in enumerate(
+    ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"])}
+_WEEKDAYS.update({name[:3]: i for name, i in list(_WEEKDAYS.items())})
+_MONTHS = {name.lower(): i for i, name in enumerate(calendar.month_name) if name}
+_MONTHS.update({name.lower(): i for i, name in enumerate(calendar.month_abbr) if name})
+_MONTHS["sept"] = 9
+
+_WEEKDAY_ALT = "monday|tuesday|wednesday|thursday|friday|saturday|sunday"
+_MONTH_ALT = ("january|february|march|april|may|june|july|august|september|october|november|december"
+              "|jan|feb|mar|apr|jun|jul|aug|sept|sep|oct|nov|dec")
+_COUNT_ALT = r"\d+|an?|one|two|three|four|five|six|seven|eight|nine|ten|couple of|few"
+
+_DATE_RE = re.compile(
+    r"\b(?:"
+    r"(?P<today>today|tonight|this evening|this afternoon)"
+    r"|(?P<day_after>day after tomorrow)"
+    r"|(?P<tomorrow>tomorrow|tmrw)"
+    r"|in\s+(?:a\s+)?(?P<count>" + _COUNT_ALT + r")\s+(?P<unit>minute|min|hour|hr|day|week|month|year)s?"
+    r"|(?:next|in a)\s+(?P<next>week|month|year)"
+    r"|end of (?:the\s+)?(?P<end_of>week|month)"
+    r"|this\s+(?P<this>weekend)"
+    r"|(?:(?:next|on|by|this|due)\s+)?(?P<weekday>" + _WEEKDAY_ALT + r")"
+    r"|(?:on|by|due)\s+(?P<weekday_abbr>mon|tue|wed|thu|fri|sat|sun)"
+    r"|(?P<iso>\d{4}-\d{2}-\d{2})(?:[ t](?P<iso_time>\d{1,2}:\d{2}))?"
+    r"|(?P<us_month>\d{1,2})/(?P<us_day>\d{1,2})(?:/(?P<us_year>\d{2,4}))?"
+    r"|(?P<month>" + _MONTH_ALT + r")\.?\s+(?P<month_day>\d{1,2})(?:st|nd|rd|th)?(?:,?\s+(?P<month_year>\d{4}))?"
+    r"|(?P<day_month>\d{1,2})(?:st|nd|rd|th)?\s+(?:of\s+)?(?P<month2>" + _MONTH_ALT + r")(?:,?\s+(?P<month2_year>\d{4}))?"
+    r")\b",
+)
+# Cheap pre-check: most messages carry no date at all, and a miss on the full
+# date and time patterns costs several times more than this scan
+_DATE_HINT_RE = re.compile(
+    r"\d|today|tonight|tomorrow|tmrw|day|week|mon|year|min|hour|hr|noon|midday|evening|afternoon"
+    r"|tue|wed|thu|fri|sat|sun|jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec"
+)
+_TIME_RE = re.compile(
+    r"\b(?:at\s+)?(?P<hour>\d{1,2})(?::(?P<minute>\d{2}))?\s*(?P<ampm>am|pm|a\.m\.|p\.m\.)(?!\w)"
+    r"|\bat\s+(?P<hour24>\d{1,2}):(?P<minute24>\d{2})\b"
+    r"|\b(?P<noon>noon|midday)\b"
+    r"|\b(?P<evening>tonight|this evening)\b",
+)
+
+# --- title ----------------------------------------------------------------
+
+_QUOTED_RE = re.compile(r"(?:^|\s)[\"'‘“](?P<title>[^\"'’”]+)[\"'’”](?=\s|$|[.,!?])")
+_CREATE_TITLE_RES = [
+    re.compile(r"\b(?:task|reminder|todo|to-do)\s+(?:to|for|called|named|titled|about)\s+(?P<title>.+)"),
+    re.compile(r"\bremind me (?:to|about)\s+(?P<title>.+)"),
+    re.compile(r"\b(?:create|add|new)\s+(?:a\s+|an\s+)?(?:new\s+)?(?:\w+\s+priority\s+)?"
+               r"(?:task|todo|reminder)\s*[:\-]\s*(?P<title>.+)"),
+    re.compile(r"\b(?:i need to|i have to|need to|schedule)\s+(?P<title>.+)"),
+    re.compile(r"\b(?:create|add)\s+(?:a\s+|an\s+)?(?:new\s+)?(?P<title>.+?)\s+(?:task|todo|reminder)\b"),
+    re.compile(r"\b(?:create|add)\s+(?P<title>.+)"),
+]
+_TARGET_TITLE_RES = [
+    re.compile(r"\b(?:about|regarding|called|named|titled)\s+(?P<title>.+)"),
+    re.compile(r"\b(?:priority|status|due date|deadline|title)\s+(?:of|for)\s+(?P<title>.+)"),
+    re.compile(r"\b(?:mark|set|move|update|change|complete|finish|delete|remove|drop|cancel|start|reopen|edit)"
+               r"\s+(?:working on\s+|work on\s+)?(?P<title>.+)"),
+]
+# Everything from the first of these on is not part of the title
+_TITLE_TRAILER_RE = re.compile(
+    r"[,.!?;]|\s+(?:"
+    r"today|tonight|tomorrow|tmrw|(?:the )?day after tomorrow|next \w+|in (?:a |an )?(?:" + _COUNT_ALT + r") \w+"
+    r"|on \w+|by \w+|for \d|at \d|at noon|at midday|due\b|before \w+|this (?:week|weekend|month|evening|afternoon|morning)"
+    r"|end of \w+|with \w+ priority|\w+ priority|priority\b|asap|urgent(?:ly)?|immediately"
+    r"|as (?:done|complete|completed|finished|pending|in progress|cancelled)|to (?:done|complete|completed|pending"
+    r"|in progress|low|medium|high|urgent)\b|(?:is )?(?:done|completed|finished)$|\d{4}-\d{2}-\d{2}"
+    r"|(?:" + _MONTH_ALT + r")\.? \d"
+    r")",
+)
+_TITLE_LEAD_RE = re.compile(r"\s*(?:(?:the|a|an|my|our|that|this)\s+)+(?:(?:task|todo|reminder)\s+(?:(?:to|about|called|named|for)\s+)?)?")
+_TITLE_TAIL_RE = re.compile(r"\s+(?:task|todo|reminder|one)$")
+_NOT_TITLES = {"", "a", "an", "the", "task", "new", "new task", "it", "one", "that", "this"}
+
+
+def _clean_title(raw: str, lowered: str) -> Optional[str]:
+    trailer = _TITLE_TRAILER_RE.search(lowered)
+    end = trailer.start() if trailer else len(lowered)
+    lead = _TITLE_LEAD_RE.match(lowered, 0, end)
+    start = lead.end() if lead else 0
+    tail = _TITLE_TAIL_RE.search(lowered, start, end)
+    if tail:
+        end = tail.start()
+    title = raw[start:end].strip(" \"'")
+    if title.lower() in _NOT_TITLES:
+        return None
+    return title[:255]
+
+
+def _extract_title(message: str, text: str, intent: Optional[str]) -> Optional[str]:
+    if "'" in message or '"' in message or "‘" in message or "“" in message:
+        quoted = _QUOTED_RE.search(message)
+        if quoted:
+            return quoted.group("title").strip()[:255] or None
+    if intent == "list":
+        return None
+    # Titles keep the user's casing unless lowercasing changed the length
+    original = message if len(message) == len(text) else text
+    for pattern in (_CREATE_TITLE_RES if intent == "create" else _TARGET_TITLE_RES):
+        match = pattern.search(text)
+        if match:
+            start, end = match.span("title")
+            title = _clean_title(original[start:end], text[start:end])
+            if title:
+                return title
+    return None
+
+
+def _add_months(value: datetime, months: int) -> datetime:
+    month = value.month - 1 + months
+    year = value.year + month // 12
+    month = month % 12 + 1
+    return value.replace(year=year, month=month, day=min(value.day, calendar.monthrange(year, month)[1]))
+
+
+def _safe_date(year: int, month: int, day: int) -> Optional[datetime]:
+    try:
+        return datetime(year, month, day)
+    except ValueError:
+        return None
+
+
+def _extract_due_date(text: str, now: datetime) -> Optional[datetime]:
+    if not _DATE_HINT_RE.search(text):
+        return None
+    match = _DATE_RE.search(text)
+    time_match = _TIME_RE.search(text)
+    if not match and not time_match:
+        return None
+
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    due = None
+    exact = False  # already has a time of day
+    if match:
+        g = match.groupdict()
+        if g["today"]:
+            due = today
+        elif g["day_after"]:
+            due = today + timedelta(days=2)
+        elif g["tomorrow"]:
+            due = today + timedelta(days=1)
+        elif g["count"]:
+            count_text = g["count"]
+            count = int(count_text) if count_text.isdigit() else _NUMBER_WORDS[count_text]
+            unit = g["unit"]
+            if unit in ("minute", "min"):
+                due, exact = now + timedelta(minutes=count), True
+            elif unit in ("hour", "hr"):
+                due, exact = now + timedelta(hours=count), True
+            elif unit == "day":
+                due = today + timedelta(days=count)
+            elif unit == "week":
+                due = today + timedelta(weeks=count)
+            elif unit == "month":
+                due = _add_months(today, count)
+            else:
+                due = _add_months(today, 12 * count)
+        elif g["next"]:
+            unit = g["next"]
+            if unit == "week":
+                due = today + timedelta(weeks=1)
+            elif unit == "month":
+                due = _add_months(today, 1)
+            else:
+                due = _add_months(today, 12)
+        elif g["end_of"]:
+            if g["end_of"] == "week":
+                due = today + timedelta(days=6 - today.weekday())
+            else:
+                due = today.replace(day=calendar.monthrange(today.year, today.month)[1])
+        elif g["this"]:
+            due = today + timedelta(days=(5 - today.weekday()) % 7)
+        elif g["weekday"] or g["weekday_abbr"]:
+            weekday = _WEEKDAYS[g["weekday"] or g["weekday_abbr"]]
+            # Always the next occurrence, never today; "next friday" means the same
+            due = today + timedelta(days=(weekday - today.weekday()) % 7 or 7)
+        elif g["iso"]:
+            due = _safe_date(*map(int, g["iso"].split("-")))
+            if due and g["iso_time"]:
+                hour, minute = map(int, g["iso_time"].split(":"))
+                if hour < 24 and minute < 60:
+                    due, exact = due.replace(hour=hour, minute=minute), True
+        elif g["us_month"]:
+            year = int(g["us_year"]) if g["us_year"] else today.year
+            if year < 100:
+                year += 2000
+            due = _safe_date(year, int(g["us_month"]), int(g["us_day"]))
+            if due and not g["us_year"] and due < today:
+                due = _safe_date(year + 1, due.month, due.day)
+        else:
+            month = _MONTHS[g["month"] or g["month2"]]
+            day = int(g["month_day"] or g["day_month"])
+            explicit_year = g["month_year"] or g["month2_year"]
+            due = _safe_date(int(explicit_year) if explicit_year else today.year, month, day)
+            if due and not explicit_year and due < today:
+                due = _safe_date(today.year + 1, month, day)
+
+    if time_match and not exact:
+        t = time_match.groupdict()
+        if t["noon"]:
+            hour, minute = 12, 0
+        elif t["evening"]:
+            hour, minute = 18, 0
+        elif t["hour24"]:
+            hour, minute = int(t["hour24"]), int(t["minute24"])
+        else:
+            hour, minute = int(t["hour"]) % 12, int(t["minute"] or 0)
+            if t["ampm"].startswith("p"):
+                hour += 12
+        if hour < 24 and minute < 60:
+            base = due or today
+            due = base.replace(hour=hour, minute=minute)
+            # A bare time that has already passed means tomorrow
+            if base is today and not match and due <= now:
+                due += timedelta(days=1)
+    return due
+
+
+def _extract_priority(text: str) -> Optional[str]:
+    if not ("priority" in text or "urgent" in text or "asap" in text or "critical" in text
+            or "immediately" in text or "important" in text):
+        return None
+    match = _PRIORITY_RE.search(text)
+    if not match:
+        return None
+    level = match.group("level") or match.group("level2") or match.group("level3")
+    if level:
+        return _PRIORITY_WORDS[level]
+    return "urgent" if match.group("urgent") else "high"
+
+
+def _extract_status(text: str, intent: Optional[str]) -> Optional[str]:
+    # Creation text describes the work ("a task to finish the report"), not its state
+    if intent == "create":
+        return None
+    match = _STATUS_RE.search(text)
+    if not match or match.lastgroup == "removed":
+        return None
+    return match.lastgroup
+
+
+def _find_task_id(text: str) -> Optional[re.Match]:
+    if not _DIGIT_RE.search(text):
+        return None
+    return _TASK_ID_RE.search(text)
+
+
+def extract(message: str, now: Optional[datetime] = None) -> Entities:
+    """Extract intent, title, priority, status, due date and task id from one message"""
+    text = message.lower()
+    intent_match = _INTENT_RE.search(text)
+    intent = intent_match.lastgroup if intent_match else None
+    id_match = _find_task_id(text)
+    task_id = int(id_match.group("id") or id_match.group("hash")) if id_match else None
+    title = _extract_title(message, text, intent)
+    if id_match and title:
+        if _TASK_ID_RE.fullmatch(title.lower()):
+            # "delete task 7" names the task by id only
+            title = None
+        elif id_match.group(0) in title.lower():
+            # "mark fix bug #12 done", "the call with task 2 owner": the number is part of the title
+            task_id = None
+    return Entities(
+        intent,
+        title,
+        _extract_priority(text),
+        _extract_status(text, intent),
+        _extract_due_date(text, now or datetime.now()),
+        task_id,
+    )
+
+
+def batch_extract(messages: Iterable[str], now: Optional[datetime] = None) -> List[Entities]:
+    """Extract entities from many messages against a single reference time"""
+    now = now or datetime.now()
+    return [extract(message, now) for message in messages]
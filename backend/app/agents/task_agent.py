@@ -1,19 +1,24 @@
-from typing import Dict, Any, List
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.schema import HumanMessage, AIMessage
+from typing import Callable, Dict, Any, List, Optional
+from app.database import writes
 from app.tools.task_tools import TaskManager
-import json
+from app.agents.context import ConversationContext, parse_follow_up
+from app.agents.extractor import Entities, extract, batch_extract
 import re
-from datetime import datetime
+import threading
+
+# "3: I'll create a new task" lines in a multi-item reply
+_NUMBERED_LINE_RE = re.compile(r"^\s*(\d+)\s*[:.)]\s*(.*\S)", re.MULTILINE)
 
 class TaskAgent:
-    def __init__(self, api_key: str):
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.0-flash-exp",
-            google_api_key=api_key,
-            temperature=0.1,
-            convert_system_message_to_human=True
-        )
+    def __init__(self, api_key: str, llm=None, batch_prompt_size: int = 20):
+        # Any chat model exposing ``invoke(messages)`` and ``batch(inputs)`` can
+        # be injected, e.g. the offline fake used by the benchmark suite.
+        # Otherwise the Gemini client (and all of langchain) is only imported on
+        # first use, see ``llm``.
+        self.api_key = api_key
+        self._llm = llm
+        self._llm_lock = threading.Lock()
+        self.batch_prompt_size = batch_prompt_size
         self.system_prompt = """You are an AI task management assistant. You help users manage their tasks through natural language commands.
 
 Available tools:
@@ -38,158 +43,285 @@ For date parsing, try to understand natural language dates like "tomorrow", "nex
 Priority levels: low, medium, high, urgent
 Status levels: pending, in_progress, completed, cancelled"""
 
-    def process_message(self, user_message: str, db_session) -> Dict[str, Any]:
+    @property
+    def llm(self):
+        """Chat model, created on first access"""
+        if self._llm is None:
+            with self._llm_lock:
+                if self._llm is None:
+                    from langchain_google_genai import ChatGoogleGenerativeAI
+
+                    self._llm = ChatGoogleGenerativeAI(
+                        model="gemini-2.0-flash-exp",
+                        google_api_key=self.api_key,
+                        temperature=0.1,
+                        convert_system_message_to_human=True
+                    )
+        return self._llm
+
+    @property
+    def is_warm(self) -> bool:
+        return self._llm is not None
+
+    def warm_up(self):
+        """Load the LLM client and langchain ahead of the first chat message"""
+        from langchain.schema import HumanMessage  # noqa: F401
+
+        return self.llm
+
+    def process_message(self, user_message: str, db_session,
+                        context: ConversationContext = None) -> Dict[str, Any]:
         """Process a user message and return response"""
         try:
             # Initialize task manager
             task_manager = TaskManager(db_session)
             
-            # Create messages for the LLM
-            messages = [
-                HumanMessage(content=f"{self.system_prompt}\n\nUser request: {user_message}")
-            ]
+            # Follow-ups like "mark the second one done" resolve against the
+            # session context without an LLM round trip
+            if context is not None:
+                follow_up = self._handle_follow_up(user_message, task_manager, context)
+                if follow_up is not None:
+                    context.add_turn(user_message, follow_up["response"])
+                    return follow_up
             
-            # Get response from LLM
-            response = self.llm.invoke(messages)
-            llm_response = response.content.lower()
+            # Entities are parsed locally; the LLM only classifies the request
+            entities = extract(user_message)
+            llm_response = self._classify(user_message)
+            return self._execute(user_message, llm_response, entities, task_manager, context)
             
-            # Parse the user's intent and execute appropriate actions
-            tasks_updated = False
-            response_text = ""
+        except Exception as e:
+            return self._error(e)
+
+    def process_batch(self, user_messages: List[str], db_session, context: ConversationContext = None,
+                      on_retry: Optional[Callable[[int], None]] = None) -> List[Dict[str, Any]]:
+        """Process many messages with few LLM calls and a single transaction.
+
+        Messages are classified ``batch_prompt_size`` at a time in numbered
+        multi-item prompts, all sent in one ``llm.batch`` call. The resulting
+        task operations then run in order, each in its own savepoint, and are
+        committed together. Returns one result per message, in order.
+        ``on_retry(n)`` is told about the ``n`` extra LLM calls made for items
+        a multi-item reply left out.
+        """
+        task_manager = TaskManager(db_session, autocommit=False)
+        entities = batch_extract(user_messages)
+
+        # Every message is classified before the transaction opens, so no LLM
+        # call ever runs while write locks are held. Follow-ups depend on what
+        # earlier messages listed; their reply is only used if they don't resolve.
+        try:
+            classified = self._classify_batch(user_messages, on_retry)
+        except Exception as e:
+            return [self._error(e) for _ in user_messages]
+
+        writes.begin_transaction(db_session)
+        results = []
+        for i, message in enumerate(user_messages):
+            try:
+                result = None
+                if context is not None:
+                    result = self._handle_follow_up(message, task_manager, context)
+                    if result is not None:
+                        context.add_turn(message, result["response"])
+                if result is None:
+                    result = self._execute(message, classified[i], entities[i], task_manager, context)
+            except Exception as e:
+                result = self._error(e)
+            # The store is only invalidated once the batch commits, so later
+            # listings in this batch must not reuse a snapshot taken before
+            if context is not None and result["tasks_updated"]:
+                context.forget_snapshot()
+            results.append(result)
+
+        db_session.commit()
+        return results
+
+    def _prompt(self, user_message: str) -> str:
+        return f"{self.system_prompt}\n\nUser request: {user_message}"
+
+    def _batch_prompt(self, user_messages: List[str]) -> str:
+        numbered = "\n".join(f"{n}. {' '.join(message.split())}" for n, message in enumerate(user_messages, 1))
+        return (
+            f"{self.system_prompt}\n\n"
+            "Handle each numbered user request below on its own. Reply with exactly one line "
+            "per request, formatted as '<number>: <what you will do>', and nothing else.\n\n"
+            f"User requests:\n{numbered}"
+        )
+
+    def _classify(self, user_message: str) -> str:
+        """Lower-cased LLM reply describing what to do with ``user_message``"""
+        from langchain.schema import HumanMessage
+
+        response = self.llm.invoke([HumanMessage(content=self._prompt(user_message))])
+        return response.content.lower()
+
+    def _classify_batch(self, user_messages: List[str],
+                        on_retry: Optional[Callable[[int], None]] = None) -> List[str]:
+        """``_classify`` for many messages, using one LLM request per ``batch_prompt_size``"""
+        if not user_messages:
+            return []
+        from langchain.schema import HumanMessage
+
+        size = self.batch_prompt_size
+        chunks = [user_messages[i:i + size] for i in range(0, len(user_messages), size)]
+        responses = self.llm.batch([[HumanMessage(content=self._batch_prompt(chunk))] for chunk in chunks])
+        replies: List[Optional[str]] = []
+        for chunk, response in zip(chunks, responses):
+            replies += self._parse_numbered(response.content, len(chunk))
+
+        # Items the model skipped or merged get a prompt of their own
+        missing = [i for i, reply in enumerate(replies) if reply is None]
+        if missing:
+            if on_retry is not None:
+                on_retry(len(missing))
+            retried = self.llm.batch([[HumanMessage(content=self._prompt(user_messages[i]))] for i in missing])
+            for i, response in zip(missing, retried):
+                replies[i] = response.content.lower()
+        return replies
+
+    @staticmethod
+    def _parse_numbered(content: str, count: int) -> List[Optional[str]]:
+        replies: List[Optional[str]] = [None] * count
+        for match in _NUMBERED_LINE_RE.finditer(content):
+            index = int(match.group(1)) - 1
+            if 0 <= index < count and replies[index] is None:
+                replies[index] = match.group(2).lower()
+        return replies
+
+    @staticmethod
+    def _error(error: Exception) -> Dict[str, Any]:
+        return {
+            "response": f"I encountered an error: {str(error)}",
+            "tasks_updated": False,
+            "success": False
+        }
+
+    def _execute(self, user_message: str, llm_response: str, entities: Entities,
+                 task_manager: TaskManager, context: Optional[ConversationContext]) -> Dict[str, Any]:
+        """Carry out the request the LLM classified as ``llm_response``"""
+        # Parse the user's intent and execute appropriate actions
+        tasks_updated = False
+        response_text = ""
+        
+        # Check for different types of requests
+        if any(word in llm_response for word in ["create", "add", "new task", "remind me"]):
+            # Task details come from the extracted entities
+            title = entities.title or "New Task"
+            priority = entities.priority or "medium"
             
-            # Check for different types of requests
-            if any(word in llm_response for word in ["create", "add", "new task", "remind me"]):
-                # Extract task details from the message
-                title = self._extract_title(user_message)
-                description = self._extract_description(user_message)
-                priority = self._extract_priority(user_message)
-                due_date = self._extract_due_date(user_message)
-                
-                result = task_manager.create_task(title, description, due_date, priority)
-                if result["success"]:
-                    response_text = result["message"]
-                    tasks_updated = True
-                else:
-                    response_text = f"Error: {result['message']}"
-                    
-            elif any(word in llm_response for word in ["show", "list", "display", "get", "find"]):
-                # Handle listing/filtering tasks
-                if "high priority" in llm_response or "urgent" in llm_response:
-                    result = task_manager.filter_tasks(priority="high")
-                elif "completed" in llm_response:
-                    result = task_manager.filter_tasks(status="completed")
-                elif "pending" in llm_response:
-                    result = task_manager.filter_tasks(status="pending")
-                else:
-                    result = task_manager.list_tasks()
-                
-                if result["success"]:
-                    tasks = result.get("tasks", [])
-                    if tasks:
-                        response_text = f"Here are your tasks:\n\n"
-                        for task in tasks:
-                            response_text += f"• {task['title']} ({task['priority']} priority, {task['status']})\n"
-                            if task.get('description'):
-                                response_text += f"  Description: {task['description']}\n"
-                            if task.get('due_date'):
-                                response_text += f"  Due: {task['due_date']}\n"
-                            response_text += "\n"
-                    else:
-                        response_text = "No tasks found matching your criteria."
-                else:
-                    response_text = f"Error: {result['message']}"
-                    
-            elif any(word in llm_response for word in ["mark", "complete", "done", "finish", "update"]):
-                # Handle task updates
-                title_match = self._extract_title(user_message)
-                if "complete" in llm_response or "done" in llm_response:
-                    result = task_manager.update_task(title_match=title_match, status="completed")
-                else:
-                    result = task_manager.update_task(title_match=title_match)
-                
-                if result["success"]:
-                    response_text = result["message"]
-                    tasks_updated = True
-                else:
-                    response_text = f"Error: {result['message']}"
-                    
-            elif any(word in llm_response for word in ["delete", "remove", "cancel"]):
-                # Handle task deletion
-                title_match = self._extract_title(user_message)
-                result = task_manager.delete_task(title_match=title_match)
+            result = task_manager.create_task(title, user_message, entities.due_date, priority)
+            if result["success"]:
+                response_text = result["message"]
+                tasks_updated = True
+                if context is not None:
+                    context.remember_task(result["task"]["id"])
+            else:
+                response_text = f"Error: {result['message']}"
                 
-                if result["success"]:
-                    response_text = result["message"]
-                    tasks_updated = True
+        elif any(word in llm_response for word in ["show", "list", "display", "get", "find"]):
+            # Handle listing/filtering tasks
+            if entities.priority:
+                listing_key = ("priority", entities.priority)
+            elif entities.status:
+                listing_key = ("status", entities.status)
+            elif "high priority" in llm_response or "urgent" in llm_response:
+                listing_key = ("priority", "high")
+            elif "completed" in llm_response:
+                listing_key = ("status", "completed")
+            elif "pending" in llm_response:
+                listing_key = ("status", "pending")
+            else:
+                listing_key = ("all",)
+            
+            cached = context.cached_listing(listing_key) if context is not None else None
+            if cached is not None:
+                result = {"success": True, "tasks": cached}
+            elif listing_key[0] == "priority":
+                result = task_manager.filter_tasks(priority=listing_key[1])
+            elif listing_key[0] == "status":
+                result = task_manager.filter_tasks(status=listing_key[1])
+            else:
+                result = task_manager.list_tasks()
+            
+            if result["success"]:
+                tasks = result.get("tasks", [])
+                if context is not None:
+                    context.remember_listing(listing_key, tasks)
+                if tasks:
+                    response_text = f"Here are your tasks:\n\n"
+                    for task in tasks:
+                        response_text += f"• {task['title']} ({task['priority']} priority, {task['status']})\n"
+                        if task.get('description'):
+                            response_text += f"  Description: {task['description']}\n"
+                        if task.get('due_date'):
+                            response_text += f"  Due: {task['due_date']}\n"
+                        response_text += "\n"
                 else:
-                    response_text = f"Error: {result['message']}"
-                    
+                    response_text = "No tasks found matching your criteria."
             else:
-                # General response
-                response_text = "I can help you manage your tasks! You can ask me to create, list, update, or delete tasks. For example, try saying 'Create a task to buy milk tomorrow' or 'Show me all high priority tasks'."
+                response_text = f"Error: {result['message']}"
+                
+        elif any(word in llm_response for word in ["mark", "complete", "done", "finish", "update"]):
+            # Handle task updates
+            status = entities.status
+            if status is None and ("complete" in llm_response or "done" in llm_response):
+                status = "completed"
+            result = task_manager.update_task(
+                task_id=entities.task_id,
+                title_match=entities.title,
+                status=status,
+                priority=entities.priority,
+                due_date=entities.due_date
+            )
             
-            return {
-                "response": response_text,
-                "tasks_updated": tasks_updated,
-                "success": True
-            }
+            if result["success"]:
+                response_text = result["message"]
+                tasks_updated = True
+                if context is not None:
+                    context.remember_task(result["task"]["id"])
+            else:
+                response_text = f"Error: {result['message']}"
+                
+        elif any(word in llm_response for word in ["delete", "remove", "cancel"]):
+            # Handle task deletion
+            result = task_manager.delete_task(task_id=entities.task_id, title_match=entities.title)
             
-        except Exception as e:
-            return {
-                "response": f"I encountered an error: {str(e)}",
-                "tasks_updated": False,
-                "success": False
-            }
-    
-    def _extract_title(self, message: str) -> str:
-        """Extract task title from user message"""
-        # Simple extraction - look for patterns like "task to X" or "remind me to X"
-        message_lower = message.lower()
-        if "task to" in message_lower:
-            title_words = message.split("task to")[1].split()[:3]  # Take first few words
-            return " ".join(title_words)
-        elif "remind me to" in message_lower:
-            title_words = message.split("remind me to")[1].split()[:3]
-            return " ".join(title_words)
-        elif "create" in message_lower and "task" in message_lower:
-            # Extract words after "create" and before "task"
-            parts = message.split()
-            try:
-                create_idx = parts.index("create")
-                task_idx = parts.index("task")
-                if task_idx > create_idx:
-                    return " ".join(parts[create_idx+1:task_idx])
-            except:
-                pass
-        return "New Task"
-    
-    def _extract_description(self, message: str) -> str:
-        """Extract task description from user message"""
-        # For now, use the full message as description
-        return message
-    
-    def _extract_priority(self, message: str) -> str:
-        """Extract priority from user message"""
-        message = message.lower()
-        if "urgent" in message:
-            return "urgent"
-        elif "high priority" in message or "high" in message:
-            return "high"
-        elif "low priority" in message or "low" in message:
-            return "low"
+            if result["success"]:
+                response_text = result["message"]
+                tasks_updated = True
+            else:
+                response_text = f"Error: {result['message']}"
+                
         else:
-            return "medium"
+            # General response
+            response_text = "I can help you manage your tasks! You can ask me to create, list, update, or delete tasks. For example, try saying 'Create a task to buy milk tomorrow' or 'Show me all high priority tasks'."
+        
+        if context is not None:
+            context.add_turn(user_message, response_text)
+        
+        return {
+            "response": response_text,
+            "tasks_updated": tasks_updated,
+            "success": True
+        }
     
-    def _extract_due_date(self, message: str) -> datetime:
-        """Extract due date from user message"""
-        message = message.lower()
-        if "tomorrow" in message:
-            from datetime import datetime, timedelta
-            tomorrow = datetime.now() + timedelta(days=1)
-            return tomorrow
-        elif "next week" in message:
-            from datetime import datetime, timedelta
-            next_week = datetime.now() + timedelta(weeks=1)
-            return next_week
-        # Add more date parsing as needed
-        return None
+    def _handle_follow_up(self, message: str, task_manager: TaskManager,
+                          context: ConversationContext) -> Dict[str, Any]:
+        """Execute a reference-based follow-up, or return None to fall back to the LLM"""
+        parsed = parse_follow_up(message)
+        if parsed is None:
+            return None
+        action, position = parsed
+        task_id = context.resolve(position)
+        if task_id is None:
+            return None
+
+        if action == "delete":
+            result = task_manager.delete_task(task_id=task_id)
+        else:
+            result = task_manager.update_task(task_id=task_id, status=action)
+
+        if not result["success"]:
+            return {"response": f"Error: {result['message']}", "tasks_updated": False, "success": True}
+        context.remember_task(None if action == "delete" else task_id)
+        return {"response": result["message"], "tasks_updated": True, "success": True}
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, insert, select
+
+from app.models.task import Task, ArchivedTask, ARCHIVABLE_STATUSES
+
+_COLUMNS = ["id", "title", "description", "status", "due_date", "priority", "created_at", "updated_at",
+            "version"]
+
+
+def archive_tasks(engine, older_than: timedelta, batch_size: int = 1000,
+                  max_batches: Optional[int] = None) -> int:
+    """Move completed/cancelled tasks not updated within ``older_than`` to ``tasks_archive``.
+
+    Each batch is its own short transaction (copy, then delete the copied ids),
+    so the hot table is never locked for long. Returns the number of rows moved.
+    """
+    cutoff = datetime.now(timezone.utc) - older_than
+    hot = Task.__table__
+    archive = ArchivedTask.__table__
+    # Re-checked by every statement: a task reopened or edited after the
+    # SELECT must stay in the hot table rather than be archived stale
+    archivable = (hot.c.status.in_(ARCHIVABLE_STATUSES), hot.c.updated_at < cutoff)
+    moved = 0
+    batches = 0
+
+    while max_batches is None or batches < max_batches:
+        with engine.begin() as conn:
+            # Row locks (PostgreSQL) hold off concurrent edits until the batch
+            # commits; rows another transaction is writing wait for the next run
+            ids = conn.execute(
+                select(hot.c.id)
+                .where(*archivable)
+                .order_by(hot.c.id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            ).scalars().all()
+            if not ids:
+                break
+            conn.execute(
+                insert(archive).from_select(
+                    _COLUMNS, select(*[hot.c[name] for name in _COLUMNS]).where(hot.c.id.in_(ids), *archivable)
+                )
+            )
+            moved += conn.execute(delete(hot).where(hot.c.id.in_(ids), *archivable)).rowcount
+        batches += 1
+        if len(ids) < batch_size:
+            break
+    return moved
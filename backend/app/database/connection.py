@@ -31,28 +31,78 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from pydantic_settings import BaseSettings
+from fastapi import Request
+from fastapi.requests import HTTPConnection
+
+from app.admission import client_key
+from app.database.replicas import ReplicaSet, RoutingSession
 
 
 class Settings(BaseSettings):
     database_url: str  # will be read from env, no default
     google_api_key: str | None = None  # optional, can also be loaded from env
+    prewarm_agent: bool = True  # load the LLM client in the background once ready
+    context_max_sessions: int = 1000  # chat sessions kept in the agent context LRU
+    context_max_turns: int = 10  # recent turns remembered per session
+    context_max_tasks: int = 50  # listed tasks remembered per session
+    archive_enabled: bool = True  # move old completed/cancelled tasks to tasks_archive
+    archive_after_days: int = 30  # terminal tasks untouched this long get archived
+    archive_batch_size: int = 1000  # rows moved per archive transaction
+    archive_interval_seconds: int = 3600  # pause between background archive runs
+    admission_enabled: bool = True  # rate limit and cap agent work on /chat and /ws
+    rate_limit_per_minute: float = 30  # sustained agent requests per client
+    rate_limit_burst: int = 10  # extra requests a client may burst
+    agent_max_concurrency: int = 8  # agent requests processed at once
+    agent_max_queue: int = 32  # agent requests allowed to wait for a slot
+    agent_queue_timeout_ms: int = 2000  # latency budget for waiting; shed beyond it
+    trust_forwarded_for: bool = False  # key clients by the address our proxy appends to X-Forwarded-For
+    api_keys: str = ""  # comma separated X-API-Key values that get a rate limit of their own
+    chat_batch_max_messages: int = 500  # messages accepted by one POST /chat/batch
+    chat_batch_prompt_size: int = 20  # messages classified per multi-item LLM prompt
+    replica_urls: str = ""  # comma separated read-replica DSNs; empty reads from the primary
+    replica_max_lag_seconds: float = 5  # eject replicas further behind than this
+    replica_check_interval_seconds: float = 5  # pause between replica health checks
+    read_your_writes_seconds: float = 5  # clients read from the primary this long after a write
+    compression_min_bytes: int = 1024  # gzip/brotli task lists and chat replies at least this large
 
     class Config:
         env_file = ".env"
 
+    @property
+    def api_key_set(self) -> frozenset:
+        return frozenset(key.strip() for key in self.api_keys.split(",") if key.strip())
+
 
 settings = Settings()
 
-# Create database engine (PostgreSQL)
-engine = create_engine(settings.database_url)
+def make_engine(url: str):
+    """Engine for the primary or a replica (PostgreSQL in production, SQLite for local runs)"""
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    return create_engine(url, connect_args=connect_args)
+
+
+engine = make_engine(settings.database_url)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+replicas = ReplicaSet(
+    [make_engine(url.strip()) for url in settings.replica_urls.split(",") if url.strip()],
+    max_lag=settings.replica_max_lag_seconds,
+    sticky_seconds=settings.read_your_writes_seconds,
+)
+
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine,
+                            replicas=replicas)
 
 Base = declarative_base()
 
 
-def get_db():
-    db = SessionLocal()
+def caller_key(connection: HTTPConnection) -> str:
+    """Rate-limit and read-your-writes identity of an HTTP or WebSocket client"""
+    return client_key(connection.headers, connection.client, settings.trust_forwarded_for, settings.api_key_set)
+
+
+def get_db(request: Request = None):
+    """Request session; reads may go to a replica unless the caller wrote recently"""
+    db = SessionLocal(client_key=caller_key(request) if request else None)
     try:
         yield db
     finally:
@@ -0,0 +1,152 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import Select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Seconds the standby is behind; 0 when it has replayed everything it received
+_POSTGRES_LAG = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() "
+    "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+def replica_lag(engine: Engine) -> float:
+    """Replication lag in seconds; databases without replication only get a liveness ping"""
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            return float(conn.execute(_POSTGRES_LAG).scalar() or 0)
+        conn.execute(text("SELECT 1"))
+        return 0.0
+
+
+class Replica:
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        # Not used until the first health check passes
+        self.healthy = False
+        self.lag: Optional[float] = None
+        self.error: Optional[str] = None
+
+
+class ReplicaSet:
+    """Read replicas with health checks, plus read-your-writes bookkeeping.
+
+    ``check`` ejects replicas that are unreachable or lag more than
+    ``max_lag`` seconds and re-admits them once they catch up. Clients that
+    wrote within the last ``sticky_seconds`` keep reading from the primary.
+    """
+
+    def __init__(self, engines: List[Engine], max_lag: float = 5.0, sticky_seconds: float = 5.0,
+                 max_clients: int = 10000, lag_probe: Callable[[Engine], float] = replica_lag,
+                 clock=time.monotonic):
+        self.replicas = [Replica(engine) for engine in engines]
+        self.max_lag = max_lag
+        self.sticky_seconds = sticky_seconds
+        self.max_clients = max_clients
+        self._lag_probe = lag_probe
+        self._clock = clock
+        self._next = 0
+        self._writers: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def check(self):
+        """Probe every replica once (blocking)"""
+        for replica in self.replicas:
+            try:
+                replica.lag = self._lag_probe(replica.engine)
+                replica.error = None if replica.lag <= self.max_lag else f"lagging {replica.lag:.1f}s"
+            except Exception as e:
+                replica.lag = None
+                replica.error = str(e)
+            healthy = replica.error is None
+            if healthy != replica.healthy:
+                logger.warning("Replica %s %s", replica.engine.url.render_as_string(hide_password=True),
+                               "back in rotation" if healthy else f"ejected: {replica.error}")
+            replica.healthy = healthy
+
+    def choose(self) -> Optional[Engine]:
+        """Next healthy replica (round robin), or ``None`` to read from the primary"""
+        with self._lock:
+            for _ in range(len(self.replicas)):
+                replica = self.replicas[self._next % len(self.replicas)]
+                self._next += 1
+                if replica.healthy:
+                    return replica.engine
+        return None
+
+    def record_write(self, client_key: str):
+        with self._lock:
+            self._writers[client_key] = self._clock() + self.sticky_seconds
+            self._writers.move_to_end(client_key)
+            while len(self._writers) > self.max_clients:
+                self._writers.popitem(last=False)
+
+    def recently_wrote(self, client_key: str) -> bool:
+        with self._lock:
+            deadline = self._writers.get(client_key)
+            if deadline is None:
+                return False
+            if deadline <= self._clock():
+                del self._writers[client_key]
+                return False
+            return True
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "url": replica.engine.url.render_as_string(hide_password=True),
+                "healthy": replica.healthy,
+                "lag_s": replica.lag,
+                "error": replica.error,
+            }
+            for replica in self.replicas
+        ]
+
+
+class RoutingSession(Session):
+    """Sends plain SELECTs to a replica and everything else to the primary.
+
+    One replica is picked per session so its reads see a single snapshot. Once
+    the session writes, or if its client wrote within the stickiness window,
+    all further statements go to the primary. Committed writes are recorded
+    against ``client_key`` for read-your-writes.
+    """
+
+    def __init__(self, *args, replicas: Optional[ReplicaSet] = None, client_key: Optional[str] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+        self.client_key = client_key
+        self.wrote = False
+        self._replica: Optional[Engine] = None
+        self._primary_only = not replicas or (client_key is not None and replicas.recently_wrote(client_key))
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        # Anything that is not a plain SELECT (DML, raw SQL, FOR UPDATE) counts as a write
+        reading = not self._flushing and isinstance(clause, Select) and clause._for_update_arg is None
+        if not reading:
+            self.wrote = True
+            self._primary_only = True
+        if self._primary_only:
+            return super().get_bind(mapper, clause=clause, **kwargs)
+        if self._replica is None:
+            self._replica = self.replicas.choose()
+            if self._replica is None:
+                self._primary_only = True
+                return super().get_bind(mapper, clause=clause, **kwargs)
+        return self._replica
+
+    def commit(self):
+        super().commit()
+        if self.wrote and self.client_key is not None and self.replicas:
+            self.replicas.record_write(self.client_key)
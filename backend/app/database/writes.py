@@ -0,0 +1,92 @@
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.task import Task
+
+_tasks = Task.__table__
+
+
+class VersionConflict(Exception):
+    """The task was changed by someone else since the caller read it"""
+
+    def __init__(self, task_id: int, current_version: int):
+        super().__init__(f"Task {task_id} is at version {current_version}")
+        self.task_id = task_id
+        self.current_version = current_version
+
+
+def _target(task_id: Optional[int], title_match: Optional[str]):
+    if task_id:
+        return _tasks.c.id == task_id
+    # Resolved inside the write statement, so a title match is still one round trip
+    return _tasks.c.id == (
+        select(_tasks.c.id)
+        .where(_tasks.c.title.ilike(f"%{title_match}%"))
+        .order_by(_tasks.c.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def _raise_if_conflict(db: Session, condition, expected_version: Optional[int]):
+    """Only runs when a versioned write matched nothing: missing task or stale version?"""
+    if expected_version is None:
+        return
+    current = db.execute(select(_tasks.c.id, _tasks.c.version).where(condition)).first()
+    if current is not None:
+        raise VersionConflict(current.id, current.version)
+
+
+def begin_transaction(db: Session):
+    """Open ``db``'s transaction now instead of at its first write.
+
+    pysqlite only sends BEGIN right before DML, so a SAVEPOINT issued earlier
+    runs outside any transaction and its RELEASE commits on its own. Callers
+    that group writes under savepoints start here; every other session keeps
+    the deferred BEGIN so reads never hold SQLite's write lock.
+    """
+    conn = db.connection()
+    if conn.dialect.name == "sqlite" and not conn.connection.dbapi_connection.in_transaction:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def insert_task(db: Session, values: Dict[str, Any]) -> Dict[str, Any]:
+    """``INSERT ... RETURNING *``; the caller commits"""
+    return dict(db.execute(insert(_tasks).values(**values).returning(*_tasks.c)).mappings().one())
+
+
+def update_task(db: Session, values: Dict[str, Any], task_id: Optional[int] = None,
+                title_match: Optional[str] = None, expected_version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """``UPDATE ... RETURNING *`` that also bumps ``version``.
+
+    With ``expected_version`` the row is only written if nobody changed it in
+    between; otherwise ``VersionConflict`` is raised. Returns ``None`` if no
+    task matched. The caller commits.
+    """
+    condition = _target(task_id, title_match)
+    statement = update(_tasks).where(condition)
+    if expected_version is not None:
+        statement = statement.where(_tasks.c.version == expected_version)
+    row = db.execute(
+        statement.values(**values, version=_tasks.c.version + 1).returning(*_tasks.c)
+    ).mappings().first()
+    if row is None:
+        _raise_if_conflict(db, condition, expected_version)
+        return None
+    return dict(row)
+
+
+def delete_task(db: Session, task_id: Optional[int] = None, title_match: Optional[str] = None,
+                expected_version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """``DELETE ... RETURNING id, title``; same contract as ``update_task``"""
+    condition = _target(task_id, title_match)
+    statement = delete(_tasks).where(condition)
+    if expected_version is not None:
+        statement = statement.where(_tasks.c.version == expected_version)
+    row = db.execute(statement.returning(_tasks.c.id, _tasks.c.title)).mappings().first()
+    if row is None:
+        _raise_if_conflict(db, condition, expected_version)
+        return None
+    return dict(row)
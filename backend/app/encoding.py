@@ -0,0 +1,87 @@
+import gzip
+import json
+from datetime import date, datetime
+from typing import Any, Dict, Optional
+
+import brotli
+import msgpack
+from starlette.responses import Response
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+
+# Large lists are compressed per request, so favour speed: on a 10k task list
+# these take ~20-35ms for a 7x smaller body (the defaults take 2-10x longer)
+BROTLI_QUALITY = 4
+GZIP_LEVEL = 4
+
+
+def _default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot encode {type(value).__name__}")
+
+
+def _accepted(header: str) -> Dict[str, float]:
+    """``{"gzip": 1.0, "br": 0.5}`` for an Accept or Accept-Encoding header"""
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    return accepted
+
+
+def wants_msgpack(accept: str) -> bool:
+    accepted = _accepted(accept)
+    return accepted.get(MSGPACK, 0) > 0 and accepted[MSGPACK] >= accepted.get(JSON, 0)
+
+
+def content_coding(accept_encoding: str) -> Optional[str]:
+    """Best supported coding the client accepts: brotli, then gzip"""
+    accepted = _accepted(accept_encoding)
+    candidates = [coding for coding in ("br", "gzip") if accepted.get(coding, accepted.get("*", 0)) > 0]
+    return max(candidates, key=lambda coding: accepted.get(coding, accepted.get("*", 0)), default=None)
+
+
+def encode_json(content: Any) -> bytes:
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode_msgpack(content: Any) -> bytes:
+    return msgpack.packb(content, default=_default)
+
+
+def compress(body: bytes, coding: str) -> bytes:
+    if coding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def negotiated_response(headers, content: Any, min_size: int = 1024) -> Response:
+    """Encode ``content`` as JSON or msgpack per ``Accept``, compressed if it is large.
+
+    Bodies of ``min_size`` bytes or more are brotli or gzip compressed when
+    ``Accept-Encoding`` allows it; small ones are not worth the CPU.
+    """
+    if wants_msgpack(headers.get("accept", "")):
+        media_type, body = MSGPACK, encode_msgpack(content)
+    else:
+        media_type, body = JSON, encode_json(content)
+
+    response_headers = {"Vary": "Accept, Accept-Encoding"}
+    if len(body) >= min_size:
+        coding = content_coding(headers.get("accept-encoding", ""))
+        if coding:
+            body = compress(body, coding)
+            response_headers["Content-Encoding"] = coding
+    return Response(body, media_type=media_type, headers=response_headers)
+
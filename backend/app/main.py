@@ -1,22 +1,80 @@
 import os
-from fastapi import FastAPI, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select, text
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import json
 import asyncio
-from datetime import datetime
+import logging
+import uuid
+from datetime import datetime, timedelta
 
-from app.database.connection import get_db, engine, Base
-from app.models.task import Task
-from app.schemas.task import TaskCreate, TaskUpdate, TaskResponse, ChatMessage, ChatResponse
+from app.database.connection import get_db, caller_key, engine, replicas, SessionLocal
+from app.models.task import Task, ArchivedTask
+from app.database.archive import archive_tasks
+from app.database import writes
+from app.schemas.task import (
+    TaskCreate, TaskUpdate, TaskResponse, ChatMessage, ChatResponse, ChatBatchRequest, ChatBatchResponse
+)
 from app.agents.task_agent import TaskAgent
+from app.agents.context import ConversationContextStore
+from app.admission import AdmissionController, AdmissionRejected
+from app.encoding import encode_json, encode_msgpack, negotiated_response
 from app.database.connection import settings
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
+
+# The schema is managed by Alembic migrations (``alembic upgrade head``), and
+# nothing here touches the database or the LLM until the app starts serving.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = True
+    if settings.prewarm_agent:
+        # Load langchain and the Gemini client off the request path
+        asyncio.get_running_loop().run_in_executor(None, _prewarm_agent)
+    archiver = asyncio.create_task(_archive_periodically()) if settings.archive_enabled else None
+    replica_checker = asyncio.create_task(_check_replicas_periodically()) if replicas else None
+    yield
+    app.state.ready = False
+    for job in (archiver, replica_checker):
+        if job:
+            job.cancel()
+
+def _prewarm_agent():
+    try:
+        task_agent.warm_up()
+    except Exception as e:
+        # Not fatal: the first chat message retries and reports the error
+        logger.warning("Agent prewarm failed: %s", e)
 
-app = FastAPI(title="AI Task Management API", version="1.0.0")
+async def _archive_periodically():
+    """Keep the hot tasks table small by archiving old terminal tasks in the background"""
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            moved = await loop.run_in_executor(
+                None, archive_tasks, engine,
+                timedelta(days=settings.archive_after_days), settings.archive_batch_size
+            )
+            if moved:
+                logger.info("Archived %d tasks", moved)
+                context_store.invalidate()
+        except Exception as e:
+            logger.warning("Task archiving failed: %s", e)
+        await asyncio.sleep(settings.archive_interval_seconds)
+
+async def _check_replicas_periodically():
+    """Eject unreachable or lagging read replicas and re-admit them once they catch up"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await loop.run_in_executor(None, replicas.check)
+        await asyncio.sleep(settings.replica_check_interval_seconds)
+
+app = FastAPI(title="AI Task Management API", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -27,31 +85,71 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize task agent
-task_agent = TaskAgent(settings.google_api_key)
+# Initialize task agent (the LLM client is created lazily)
+task_agent = TaskAgent(settings.google_api_key, batch_prompt_size=settings.chat_batch_prompt_size)
+
+# Per-session conversation context (last listing, recent turns) for follow-ups
+context_store = ConversationContextStore(
+    max_sessions=settings.context_max_sessions,
+    max_turns=settings.context_max_turns,
+    max_tasks=settings.context_max_tasks,
+)
+
+# Per-client rate limits and a global cap on concurrent agent requests
+admission = AdmissionController(
+    per_minute=settings.rate_limit_per_minute,
+    burst=settings.rate_limit_burst,
+    max_concurrency=settings.agent_max_concurrency,
+    max_queue=settings.agent_max_queue,
+    queue_timeout=settings.agent_queue_timeout_ms / 1000.0,
+    enabled=settings.admission_enabled,
+)
+
+_REJECTION_MESSAGES = {
+    "rate_limited": "Too many requests, please slow down.",
+    "overloaded": "The assistant is busy right now.",
+}
 
 # WebSocket connection manager
 class ConnectionManager:
+    """Open sockets; ``/ws?encoding=msgpack`` clients get binary msgpack frames instead of JSON text"""
+
     def __init__(self):
         self.active_connections: List[WebSocket] = []
+        self.binary: set = set()
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
         self.active_connections.append(websocket)
+        if websocket.query_params.get("encoding") == "msgpack":
+            self.binary.add(websocket)
 
     def disconnect(self, websocket: WebSocket):
         self.active_connections.remove(websocket)
+        self.binary.discard(websocket)
+
+    async def _send(self, websocket: WebSocket, message: dict, frames: dict):
+        # Each encoding is produced at most once per message, however many sockets get it
+        if websocket in self.binary:
+            if "binary" not in frames:
+                frames["binary"] = encode_msgpack(message)
+            await websocket.send_bytes(frames["binary"])
+        else:
+            if "text" not in frames:
+                frames["text"] = encode_json(message).decode("utf-8")
+            await websocket.send_text(frames["text"])
 
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
+    async def send_personal_message(self, message: dict, websocket: WebSocket):
+        await self._send(websocket, message, {})
 
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
+    async def broadcast(self, message: dict):
+        frames = {}
+        for connection in list(self.active_connections):
             try:
-                await connection.send_text(message)
+                await self._send(connection, message, frames)
             except:
                 # Remove disconnected connections
-                self.active_connections.remove(connection)
+                self.disconnect(connection)
 
 manager = ConnectionManager()
 
@@ -63,74 +161,142 @@ async def root():
 async def health_check():
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
+def _check_database() -> bool:
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return True
+    except Exception:
+        return False
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: the app has started and the database is reachable"""
+    started = getattr(app.state, "ready", False)
+    database = started and await asyncio.get_running_loop().run_in_executor(None, _check_database)
+    ready = started and database
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "database": "ok" if database else "unavailable",
+            "agent": "warm" if task_agent.is_warm else "cold",
+            # Informational: unhealthy replicas are skipped, reads fall back to the primary
+            "replicas": replicas.status(),
+            "timestamp": datetime.now().isoformat()
+        }
+    )
+
+def _rows(db: Session, model, *criteria, skip: int = 0, limit: Optional[int] = None) -> List[dict]:
+    """Column values of matching tasks; skips building ORM objects for big lists"""
+    statement = select(model.__table__).where(*criteria).offset(skip).limit(limit)
+    return [dict(row) for row in db.execute(statement).mappings()]
+
+async def _negotiated(request: Request, content):
+    """JSON or msgpack per ``Accept``, gzip/brotli compressed above the size threshold.
+
+    Encoding and compressing a large list takes tens of milliseconds, so it
+    runs in the threadpool instead of stalling the event loop (and every
+    WebSocket) during a refetch storm.
+    """
+    return await run_in_threadpool(negotiated_response, request.headers, content, settings.compression_min_bytes)
+
 # Task CRUD endpoints
 @app.get("/tasks")
-async def get_tasks(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get all tasks"""
-    tasks = db.query(Task).offset(skip).limit(limit).all()
-    return tasks
+async def get_tasks(request: Request, skip: int = 0, limit: int = 100, include_archived: bool = False,
+                    db: Session = Depends(get_db)):
+    """Get all tasks (archived ones, after the active ones, only on request)"""
+    tasks = _rows(db, Task, skip=skip, limit=limit)
+    if include_archived and len(tasks) < limit:
+        archive_skip = max(0, skip - db.query(Task).count()) if skip else 0
+        tasks += _rows(db, ArchivedTask, skip=archive_skip, limit=limit - len(tasks))
+    return await _negotiated(request, tasks)
 
 @app.post("/tasks")
 async def create_task(task: TaskCreate, db: Session = Depends(get_db)):
     """Create a new task"""
-    db_task = Task(**task.dict())
-    db.add(db_task)
+    db_task = writes.insert_task(db, task.dict())
     db.commit()
-    db.refresh(db_task)
+    context_store.invalidate()
     return db_task
 
 @app.get("/tasks/{task_id}")
-async def get_task(task_id: int, db: Session = Depends(get_db)):
+async def get_task(task_id: int, include_archived: bool = False, db: Session = Depends(get_db)):
     """Get a specific task by ID"""
     task = db.query(Task).filter(Task.id == task_id).first()
+    if not task and include_archived:
+        task = db.query(ArchivedTask).filter(ArchivedTask.id == task_id).first()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     return task
 
+# Failed writes roll back right away: the session is only closed after the
+# response is sent, and an open write transaction would block other writers.
+def _conflict_message(conflict: writes.VersionConflict) -> str:
+    return f"Task was modified by someone else (now at version {conflict.current_version}); reload and retry"
+
 @app.put("/tasks/{task_id}")
 async def update_task(task_id: int, task_update: TaskUpdate, db: Session = Depends(get_db)):
-    """Update a task"""
-    task = db.query(Task).filter(Task.id == task_id).first()
+    """Update a task; pass the ``version`` you last saw to reject concurrent edits"""
+    update_data = task_update.dict(exclude_unset=True)
+    expected_version = update_data.pop("version", None)
+    try:
+        task = writes.update_task(db, update_data, task_id, expected_version=expected_version)
+    except writes.VersionConflict as e:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=_conflict_message(e))
     if not task:
+        db.rollback()
         raise HTTPException(status_code=404, detail="Task not found")
     
-    update_data = task_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(task, field, value)
-    
     db.commit()
-    db.refresh(task)
+    context_store.invalidate()
     return task
 
 @app.delete("/tasks/{task_id}")
-async def delete_task(task_id: int, db: Session = Depends(get_db)):
-    """Delete a task"""
-    task = db.query(Task).filter(Task.id == task_id).first()
+async def delete_task(task_id: int, version: Optional[int] = None, db: Session = Depends(get_db)):
+    """Delete a task (only at ``version``, if given)"""
+    try:
+        task = writes.delete_task(db, task_id, expected_version=version)
+    except writes.VersionConflict as e:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=_conflict_message(e))
     if not task:
+        db.rollback()
         raise HTTPException(status_code=404, detail="Task not found")
     
-    db.delete(task)
     db.commit()
+    context_store.invalidate()
     return {"message": "Task deleted successfully"}
 
 @app.get("/tasks/filter/priority/{priority}")
-async def filter_tasks_by_priority(priority: str, db: Session = Depends(get_db)):
+async def filter_tasks_by_priority(request: Request, priority: str, include_archived: bool = False,
+                                   db: Session = Depends(get_db)):
     """Filter tasks by priority"""
-    tasks = db.query(Task).filter(Task.priority == priority).all()
-    return tasks
+    tasks = _rows(db, Task, Task.priority == priority)
+    if include_archived:
+        tasks += _rows(db, ArchivedTask, ArchivedTask.priority == priority)
+    return await _negotiated(request, tasks)
 
 @app.get("/tasks/filter/status/{status}")
-async def filter_tasks_by_status(status: str, db: Session = Depends(get_db)):
+async def filter_tasks_by_status(request: Request, status: str, include_archived: bool = False,
+                                 db: Session = Depends(get_db)):
     """Filter tasks by status"""
-    tasks = db.query(Task).filter(Task.status == status).all()
-    return tasks
+    tasks = _rows(db, Task, Task.status == status)
+    if include_archived:
+        tasks += _rows(db, ArchivedTask, ArchivedTask.status == status)
+    return await _negotiated(request, tasks)
 
 # Chat endpoint
 @app.post("/chat")
-async def chat_with_agent(message: ChatMessage, db: Session = Depends(get_db)):
+async def chat_with_agent(message: ChatMessage, request: Request, db: Session = Depends(get_db)):
     """Chat with the AI agent"""
+    caller = caller_key(request)
     try:
-        result = task_agent.process_message(message.message, db)
+        async with admission.admit(caller):
+            context = context_store.get(message.session_id) if message.session_id else None
+            # The agent blocks on the LLM; keep it off the event loop
+            result = await run_in_threadpool(task_agent.process_message, message.message, db, context)
         
         response = ChatResponse(
             response=result["response"],
@@ -139,20 +305,66 @@ async def chat_with_agent(message: ChatMessage, db: Session = Depends(get_db)):
         
         # Broadcast task updates to all connected WebSocket clients
         if result["tasks_updated"]:
-            await manager.broadcast(json.dumps({
+            context_store.invalidate()
+            await manager.broadcast({
                 "type": "tasks_updated",
                 "timestamp": datetime.now().isoformat()
-            }))
+            })
         
-        return response
+        # Listings can be long; compress them like the task list routes
+        return await _negotiated(request, response.model_dump())
         
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429 if e.reason == "rate_limited" else 503,
+            detail=_REJECTION_MESSAGES[e.reason],
+            headers={"Retry-After": e.retry_after_header}
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing message: {str(e)}")
 
+@app.post("/chat/batch", response_model=ChatBatchResponse)
+async def chat_batch(batch: ChatBatchRequest, request: Request, db: Session = Depends(get_db)):
+    """Run many chat commands with batched LLM calls, in one transaction"""
+    if len(batch.messages) > settings.chat_batch_max_messages:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.chat_batch_max_messages} messages per batch"
+        )
+    caller = caller_key(request)
+    llm_calls = -(-len(batch.messages) // settings.chat_batch_prompt_size)
+    try:
+        async with admission.admit(caller, cost=llm_calls):
+            context = context_store.get(batch.session_id) if batch.session_id else None
+            results = await run_in_threadpool(
+                task_agent.process_batch, batch.messages, db, context,
+                lambda retries: admission.charge(caller, retries),
+            )
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429 if e.reason == "rate_limited" else 503,
+            detail=_REJECTION_MESSAGES[e.reason],
+            headers={"Retry-After": e.retry_after_header}
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing batch: {str(e)}")
+
+    tasks_updated = any(result["tasks_updated"] for result in results)
+    # One change event for the whole batch
+    if tasks_updated:
+        context_store.invalidate()
+        await manager.broadcast({
+            "type": "tasks_updated",
+            "timestamp": datetime.now().isoformat()
+        })
+    return await _negotiated(request, ChatBatchResponse(results=results, tasks_updated=tasks_updated).model_dump())
+
 # WebSocket endpoint for real-time chat
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await manager.connect(websocket)
+    session_id = uuid.uuid4().hex
+    caller = caller_key(websocket)
     try:
         while True:
             # Receive message from client
@@ -164,9 +376,12 @@ async def websocket_endpoint(websocket: WebSocket):
                 user_message = message_data.get("message", "")
                 
                 # Get database session for this request
-                db = next(get_db())
+                db = SessionLocal(client_key=caller)
                 try:
-                    result = task_agent.process_message(user_message, db)
+                    async with admission.admit(caller):
+                        result = await run_in_threadpool(
+                            task_agent.process_message, user_message, db, context_store.get(session_id)
+                        )
                     
                     # Send response back to client
                     response = {
@@ -176,27 +391,37 @@ async def websocket_endpoint(websocket: WebSocket):
                         "timestamp": datetime.now().isoformat()
                     }
                     
-                    await manager.send_personal_message(json.dumps(response), websocket)
+                    await manager.send_personal_message(response, websocket)
                     
                     # Broadcast task updates to all clients
                     if result["tasks_updated"]:
-                        await manager.broadcast(json.dumps({
+                        context_store.invalidate()
+                        await manager.broadcast({
                             "type": "tasks_updated",
                             "timestamp": datetime.now().isoformat()
-                        }))
+                        })
                         
+                except AdmissionRejected as e:
+                    await manager.send_personal_message({
+                        "type": "overloaded",
+                        "reason": e.reason,
+                        "message": _REJECTION_MESSAGES[e.reason],
+                        "retry_after": int(e.retry_after_header),
+                        "timestamp": datetime.now().isoformat()
+                    }, websocket)
                 except Exception as e:
                     error_response = {
                         "type": "error",
                         "message": f"Error processing message: {str(e)}",
                         "timestamp": datetime.now().isoformat()
                     }
-                    await manager.send_personal_message(json.dumps(error_response), websocket)
+                    await manager.send_personal_message(error_response, websocket)
                 finally:
                     db.close()
             
     except WebSocketDisconnect:
         manager.disconnect(websocket)
+        context_store.discard(session_id)
 
 if __name__ == "__main__":
     import uvicorn
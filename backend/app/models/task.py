@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Enum, Text
+from sqlalchemy import Column, Integer, String, DateTime, Enum, Text, Index
 from sqlalchemy.sql import func
 from app.database.connection import Base
 import enum
@@ -15,10 +15,11 @@ class TaskPriority(str, enum.Enum):
     HIGH = "high"
     URGENT = "urgent"
 
-class Task(Base):
-    __tablename__ = "tasks"
+# Terminal states; tasks in these states are moved to the archive once old enough
+ARCHIVABLE_STATUSES = (TaskStatus.COMPLETED, TaskStatus.CANCELLED)
 
-    id = Column(Integer, primary_key=True, index=True)
+class TaskColumns:
+    """Columns shared by the hot ``tasks`` table and ``tasks_archive``"""
     title = Column(String(255), nullable=False, index=True)
     description = Column(Text, nullable=True)
     status = Column(Enum(TaskStatus), default=TaskStatus.PENDING, nullable=False)
@@ -26,6 +27,23 @@ class Task(Base):
     priority = Column(Enum(TaskPriority), default=TaskPriority.MEDIUM, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    # Bumped on every write; clients send it back to detect concurrent edits
+    version = Column(Integer, default=1, server_default="1", nullable=False)
 
+class Task(TaskColumns, Base):
+    __tablename__ = "tasks"
+    __table_args__ = (
+        # Lets the archiver find old terminal tasks without a full scan
+        Index("ix_tasks_status_updated_at", "status", "updated_at"),
+        # SQLite would otherwise reuse the highest id once it was archived
+        {"sqlite_autoincrement": True},
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
 
+class ArchivedTask(TaskColumns, Base):
+    """Completed/cancelled tasks moved out of the hot table; ids are preserved"""
+    __tablename__ = "tasks_archive"
 
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
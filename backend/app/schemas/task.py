@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from app.models.task import TaskStatus, TaskPriority
 
 class TaskBase(BaseModel):
@@ -19,17 +19,20 @@ class TaskUpdate(BaseModel):
     status: Optional[TaskStatus] = None
     due_date: Optional[datetime] = None
     priority: Optional[TaskPriority] = None
+    version: Optional[int] = None  # version the client last saw; 409 if the task changed since
 
 class TaskResponse(TaskBase):
     id: int
     created_at: datetime
     updated_at: datetime
+    version: int
 
     class Config:
         from_attributes = True
 
 class ChatMessage(BaseModel):
     message: str
+    session_id: Optional[str] = None  # enables follow-ups like "mark the second one done"
     timestamp: datetime = Field(default_factory=datetime.now)
 
 class ChatResponse(BaseModel):
@@ -37,5 +40,16 @@ class ChatResponse(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.now)
     tasks_updated: bool = False
 
+class ChatBatchRequest(BaseModel):
+    messages: List[str] = Field(..., min_length=1)
+    session_id: Optional[str] = None
 
+class ChatBatchResult(BaseModel):
+    response: str
+    tasks_updated: bool = False
+    success: bool = True
 
+class ChatBatchResponse(BaseModel):
+    results: List[ChatBatchResult]  # one per message, in request order
+    tasks_updated: bool = False
+    timestamp: datetime = Field(default_factory=datetime.now)
@@ -1,122 +1,138 @@
 from typing import List, Optional, Dict, Any
 from datetime import datetime, date
 from sqlalchemy.orm import Session
-from app.models.task import Task, TaskStatus, TaskPriority
+from app.models.task import Task, ArchivedTask, TaskStatus, TaskPriority
 from app.schemas.task import TaskCreate, TaskUpdate
-from langchain.tools import tool
+from app.database import writes
 import json
 
+# Fields the agent may change; id and version are managed by the write path
+_WRITABLE_FIELDS = ("title", "description", "status", "due_date", "priority")
+
 class TaskManager:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, autocommit: bool = True):
+        # With autocommit=False the caller owns the transaction (see
+        # TaskAgent.process_batch); each write then runs in its own savepoint
+        # so a failed one only undoes itself.
         self.db = db
+        self.autocommit = autocommit
+        self._savepoint = None
+
+    def _begin(self):
+        if not self.autocommit:
+            self._savepoint = self.db.begin_nested()
+
+    def _commit(self):
+        if self.autocommit:
+            self.db.commit()
+        else:
+            self._savepoint.commit()
+
+    def _rollback(self):
+        if self.autocommit:
+            self.db.rollback()
+        elif self._savepoint is not None and self._savepoint.is_active:
+            self._savepoint.rollback()
 
     def create_task(self, title: str, description: Optional[str] = None, 
                    due_date: Optional[datetime] = None, priority: str = "medium") -> Dict[str, Any]:
         """Create a new task"""
         try:
+            self._begin()
             task_priority = TaskPriority(priority.lower()) if priority else TaskPriority.MEDIUM
-            task = Task(
-                title=title,
-                description=description,
-                due_date=due_date,
-                priority=task_priority
-            )
-            self.db.add(task)
-            self.db.commit()
-            self.db.refresh(task)
+            task = writes.insert_task(self.db, {
+                "title": title,
+                "description": description,
+                "due_date": due_date,
+                "priority": task_priority
+            })
+            self._commit()
             
             return {
                 "success": True,
                 "message": f"Task '{title}' created successfully",
                 "task": {
-                    "id": task.id,
-                    "title": task.title,
-                    "description": task.description,
-                    "status": task.status.value,
-                    "priority": task.priority.value,
-                    "due_date": task.due_date.isoformat() if task.due_date else None
+                    "id": task["id"],
+                    "title": task["title"],
+                    "description": task["description"],
+                    "status": task["status"].value,
+                    "priority": task["priority"].value,
+                    "due_date": task["due_date"].isoformat() if task["due_date"] else None
                 }
             }
         except Exception as e:
-            self.db.rollback()
+            self._rollback()
             return {"success": False, "message": f"Error creating task: {str(e)}"}
 
     def update_task(self, task_id: Optional[int] = None, title_match: Optional[str] = None,
                    **updates) -> Dict[str, Any]:
         """Update an existing task by ID or title match"""
+        if not task_id and not title_match:
+            return {"success": False, "message": "Either task_id or title_match must be provided"}
         try:
-            if task_id:
-                task = self.db.query(Task).filter(Task.id == task_id).first()
-            elif title_match:
-                task = self.db.query(Task).filter(Task.title.ilike(f"%{title_match}%")).first()
-            else:
-                return {"success": False, "message": "Either task_id or title_match must be provided"}
+            self._begin()
 
-            if not task:
-                return {"success": False, "message": "Task not found"}
-
-            # Update fields
+            values = {}
             for field, value in updates.items():
-                if hasattr(task, field) and value is not None:
+                if field in _WRITABLE_FIELDS and value is not None:
                     if field == "status" and isinstance(value, str):
-                        setattr(task, field, TaskStatus(value))
+                        value = TaskStatus(value)
                     elif field == "priority" and isinstance(value, str):
-                        setattr(task, field, TaskPriority(value))
-                    else:
-                        setattr(task, field, value)
+                        value = TaskPriority(value)
+                    values[field] = value
 
-            self.db.commit()
-            self.db.refresh(task)
+            task = writes.update_task(self.db, values, task_id, title_match)
+            if not task:
+                self._rollback()
+                return {"success": False, "message": "Task not found"}
+            self._commit()
             
             return {
                 "success": True,
-                "message": f"Task '{task.title}' updated successfully",
+                "message": f"Task '{task['title']}' updated successfully",
                 "task": {
-                    "id": task.id,
-                    "title": task.title,
-                    "description": task.description,
-                    "status": task.status.value,
-                    "priority": task.priority.value,
-                    "due_date": task.due_date.isoformat() if task.due_date else None
+                    "id": task["id"],
+                    "title": task["title"],
+                    "description": task["description"],
+                    "status": task["status"].value,
+                    "priority": task["priority"].value,
+                    "due_date": task["due_date"].isoformat() if task["due_date"] else None
                 }
             }
         except Exception as e:
-            self.db.rollback()
+            self._rollback()
             return {"success": False, "message": f"Error updating task: {str(e)}"}
 
     def delete_task(self, task_id: Optional[int] = None, title_match: Optional[str] = None) -> Dict[str, Any]:
         """Delete a task by ID or title match"""
+        if not task_id and not title_match:
+            return {"success": False, "message": "Either task_id or title_match must be provided"}
         try:
-            if task_id:
-                task = self.db.query(Task).filter(Task.id == task_id).first()
-            elif title_match:
-                task = self.db.query(Task).filter(Task.title.ilike(f"%{title_match}%")).first()
-            else:
-                return {"success": False, "message": "Either task_id or title_match must be provided"}
+            self._begin()
 
+            task = writes.delete_task(self.db, task_id, title_match)
             if not task:
+                self._rollback()
                 return {"success": False, "message": "Task not found"}
-
-            task_title = task.title
-            self.db.delete(task)
-            self.db.commit()
+            self._commit()
             
             return {
                 "success": True,
-                "message": f"Task '{task_title}' deleted successfully"
+                "message": f"Task '{task['title']}' deleted successfully"
             }
         except Exception as e:
-            self.db.rollback()
+            self._rollback()
             return {"success": False, "message": f"Error deleting task: {str(e)}"}
 
-    def list_tasks(self, status: Optional[str] = None) -> Dict[str, Any]:
+    def list_tasks(self, status: Optional[str] = None, include_archived: bool = False) -> Dict[str, Any]:
         """List all tasks, optionally filtered by status"""
         try:
-            query = self.db.query(Task)
-            if status:
-                query = query.filter(Task.status == TaskStatus(status))
-            
-            tasks = query.order_by(Task.created_at.desc()).all()
+            tasks = []
+            for model in (Task, ArchivedTask) if include_archived else (Task,):
+                query = self.db.query(model)
+                if status:
+                    query = query.filter(model.status == TaskStatus(status))
+                tasks += query.order_by(model.created_at.desc()).all()
             
             task_list = []
             for task in tasks:
@@ -139,24 +155,26 @@ class TaskManager:
             return {"success": False, "message": f"Error listing tasks: {str(e)}"}
 
     def filter_tasks(self, priority: Optional[str] = None, status: Optional[str] = None,
-                    due_date_filter: Optional[str] = None) -> Dict[str, Any]:
+                    due_date_filter: Optional[str] = None, include_archived: bool = False) -> Dict[str, Any]:
         """Filter tasks by priority, status, or due date"""
         try:
-            query = self.db.query(Task)
-            
-            if priority:
-                query = query.filter(Task.priority == TaskPriority(priority))
-            if status:
-                query = query.filter(Task.status == TaskStatus(status))
-            if due_date_filter:
-                # Simple date filtering - can be enhanced
-                if due_date_filter == "today":
-                    today = datetime.now().date()
-                    query = query.filter(Task.due_date.cast(date) == today)
-                elif due_date_filter == "overdue":
-                    query = query.filter(Task.due_date < datetime.now())
-            
-            tasks = query.order_by(Task.priority.desc(), Task.due_date.asc()).all()
+            tasks = []
+            for model in (Task, ArchivedTask) if include_archived else (Task,):
+                query = self.db.query(model)
+                
+                if priority:
+                    query = query.filter(model.priority == TaskPriority(priority))
+                if status:
+                    query = query.filter(model.status == TaskStatus(status))
+                if due_date_filter:
+                    # Simple date filtering - can be enhanced
+                    if due_date_filter == "today":
+                        today = datetime.now().date()
+                        query = query.filter(model.due_date.cast(date) == today)
+                    elif due_date_filter == "overdue":
+                        query = query.filter(model.due_date < datetime.now())
+                
+                tasks += query.order_by(model.priority.desc(), model.due_date.asc()).all()
             
             task_list = []
             for task in tasks:
@@ -178,8 +196,10 @@ class TaskManager:
         except Exception as e:
             return {"success": False, "message": f"Error filtering tasks: {str(e)}"}
 
-# LangGraph tools
+# LangGraph tools (langchain is imported inside each factory so it stays off the startup path)
 def create_task_tool(db: Session):
+    from langchain.tools import tool
+
     @tool
     def create_task(title: str, description: str = "", due_date: str = "", priority: str = "medium") -> str:
         """Create a new task with title, description, optional due_date and priority.
@@ -204,6 +224,8 @@ def create_task_tool(db: Session):
     return create_task
 
 def update_task_tool(db: Session):
+    from langchain.tools import tool
+
     @tool
     def update_task(task_id: int = 0, title_match: str = "", title: str = "", 
                    description: str = "", status: str = "", priority: str = "", 
@@ -245,6 +267,8 @@ def update_task_tool(db: Session):
     return update_task
 
 def delete_task_tool(db: Session):
+    from langchain.tools import tool
+
     @tool
     def delete_task(task_id: int = 0, title_match: str = "") -> str:
         """Delete a task by ID or title match.
@@ -263,36 +287,43 @@ def delete_task_tool(db: Session):
     return delete_task
 
 def list_tasks_tool(db: Session):
+    from langchain.tools import tool
+
     @tool
-    def list_tasks(status: str = "") -> str:
+    def list_tasks(status: str = "", include_archived: bool = False) -> str:
         """List all tasks, optionally filtered by status.
         
         Args:
             status: Filter by status - pending, in_progress, completed, cancelled (optional)
+            include_archived: Also list old completed/cancelled tasks (default: false)
         """
         task_manager = TaskManager(db)
         status_val = status if status else None
-        result = task_manager.list_tasks(status_val)
+        result = task_manager.list_tasks(status_val, include_archived)
         return json.dumps(result)
     
     return list_tasks
 
 def filter_tasks_tool(db: Session):
+    from langchain.tools import tool
+
     @tool
-    def filter_tasks(priority: str = "", status: str = "", due_date_filter: str = "") -> str:
+    def filter_tasks(priority: str = "", status: str = "", due_date_filter: str = "",
+                     include_archived: bool = False) -> str:
         """Filter tasks by priority, status, or due date.
         
         Args:
             priority: Filter by priority - low, medium, high, urgent (optional)
             status: Filter by status - pending, in_progress, completed, cancelled (optional)
             due_date_filter: Filter by due date - today, overdue (optional)
+            include_archived: Also search old completed/cancelled tasks (default: false)
         """
         task_manager = TaskManager(db)
         priority_val = priority if priority else None
         status_val = status if status else None
         due_date_val = due_date_filter if due_date_filter else None
         
-        result = task_manager.filter_tasks(priority_val, status_val, due_date_val)
+        result = task_manager.filter_tasks(priority_val, status_val, due_date_val, include_archived)
         return json.dumps(result)
     
     return filter_tasks
@@ -0,0 +1,4 @@
+"""Offline load-test and benchmark suite.
+
+Run from ``backend/`` with ``python -m benchmarks --help``.
+"""
@@ -0,0 +1,109 @@
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import delete, func, insert, select
+
+from app.database.connection import Base
+from app.models.task import Task, TaskStatus, TaskPriority
+
+# Fixed reference point so the same seed always produces the same rows
+EPOCH = datetime(2024, 1, 1, 9, 0, 0)
+
+VERBS = ["Buy", "Call", "Email", "Review", "Write", "Fix", "Plan", "Book", "Clean", "Prepare",
+         "Schedule", "Update", "Pay", "Renew", "Organize", "Submit", "Read", "Order"]
+OBJECTS = ["milk", "groceries", "report", "dentist", "invoice", "slides", "flight", "garage",
+           "budget", "presentation", "newsletter", "contract", "team meeting", "car insurance",
+           "blog post", "tax return", "birthday gift", "quarterly review"]
+
+# Completed history dominates real task tables; keep the same skew here
+STATUS_WEIGHTS = [
+    (TaskStatus.COMPLETED, 45),
+    (TaskStatus.PENDING, 30),
+    (TaskStatus.IN_PROGRESS, 15),
+    (TaskStatus.CANCELLED, 10),
+]
+PRIORITY_WEIGHTS = [
+    (TaskPriority.LOW, 25),
+    (TaskPriority.MEDIUM, 45),
+    (TaskPriority.HIGH, 22),
+    (TaskPriority.URGENT, 8),
+]
+
+CHAT_MESSAGES = [
+    "Create a task to {verb} {obj} tomorrow",
+    "Remind me to {verb} {obj} next week",
+    "Add a high priority task to {verb} {obj}",
+    "Show me all high priority tasks",
+    "List my pending tasks",
+    "Show completed tasks",
+    "Mark {verb} {obj} as done",
+    "Delete the task about {obj}",
+    "Hello, what can you do?",
+]
+
+
+def generate_tasks(count: int, seed: int = 42, now: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+    """Yield ``count`` reproducible task rows ready for a bulk insert"""
+    rng = random.Random(seed)
+    now = now or EPOCH
+    statuses, status_weights = zip(*STATUS_WEIGHTS)
+    priorities, priority_weights = zip(*PRIORITY_WEIGHTS)
+
+    for i in range(count):
+        verb = rng.choice(VERBS)
+        obj = rng.choice(OBJECTS)
+        created_at = now - timedelta(days=rng.randint(0, 365), seconds=rng.randint(0, 86399))
+        due_date = None
+        if rng.random() < 0.7:
+            due_date = created_at + timedelta(days=rng.randint(0, 30), hours=rng.randint(0, 23))
+        yield {
+            "title": f"{verb} {obj} #{i}",
+            "description": f"{verb} the {obj} before the deadline" if rng.random() < 0.6 else None,
+            "status": rng.choices(statuses, status_weights)[0],
+            "priority": rng.choices(priorities, priority_weights)[0],
+            "due_date": due_date,
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+
+def generate_chat_messages(count: int, seed: int = 42) -> List[str]:
+    """Return ``count`` reproducible natural-language commands for the agent"""
+    rng = random.Random(seed)
+    return [
+        rng.choice(CHAT_MESSAGES).format(verb=rng.choice(VERBS).lower(), obj=rng.choice(OBJECTS))
+        for _ in range(count)
+    ]
+
+
+def seed_database(engine, count: int, seed: int = 42, batch_size: int = 5000, reset: bool = False) -> int:
+    """Create the schema and bulk insert ``count`` generated tasks.
+
+    Refuses to touch a table that already has tasks unless ``reset`` is set,
+    which deletes them first: point benchmarks at a database of their own.
+    """
+    Base.metadata.create_all(bind=engine)
+    table = Task.__table__
+    inserted = 0
+    with engine.begin() as conn:
+        if reset:
+            conn.execute(delete(table))
+        else:
+            existing = conn.execute(select(func.count()).select_from(table)).scalar()
+            if existing:
+                raise RuntimeError(
+                    f"{engine.url.render_as_string(hide_password=True)} already has {existing} tasks; "
+                    "pass --reset to delete them or --skip-seed to reuse them"
+                )
+        batch = []
+        for row in generate_tasks(count, seed):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                conn.execute(insert(table), batch)
+                inserted += len(batch)
+                batch = []
+        if batch:
+            conn.execute(insert(table), batch)
+            inserted += len(batch)
+    return inserted
@@ -0,0 +1,46 @@
+"""Throughput benchmark for ``app.agents.extractor``.
+
+    python -m benchmarks.extractor --messages 100000
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from datetime import datetime
+
+# The dataset helpers import the app settings; no database is touched here
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.agents.extractor import batch_extract
+from benchmarks.dataset import generate_chat_messages
+
+
+def run(messages: int = 100_000, repeat: int = 5, seed: int = 42) -> dict:
+    corpus = generate_chat_messages(messages, seed)
+    now = datetime.now()
+    rates = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        batch_extract(corpus, now)
+        rates.append(messages / (time.perf_counter() - started))
+    return {
+        "messages": messages,
+        "repeat": repeat,
+        "best_per_s": round(max(rates)),
+        "median_per_s": round(statistics.median(rates)),
+        "best_us_per_message": round(1_000_000 / max(rates), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.extractor")
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    print(json.dumps(run(args.messages, args.repeat, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
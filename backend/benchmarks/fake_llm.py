@@ -0,0 +1,110 @@
+import random
+import re
+import threading
+import time
+from typing import List
+
+from langchain.schema import AIMessage
+
+
+class FakeChatGoogleGenerativeAI:
+    """Deterministic, offline stand-in for ``ChatGoogleGenerativeAI``.
+
+    Replies are derived from keywords in the user request so ``TaskAgent``
+    takes the same branch it would with a well-behaved model. ``latency`` and
+    ``jitter`` (seconds) simulate the network round trip of the real API.
+    """
+
+    _INTENTS = [
+        ("delete", re.compile(r"\b(delete|remove|drop|cancel)\b"),
+         "I'll remove that task for you."),
+        ("complete", re.compile(r"\b(mark|complete|completed|done|finish|finished)\b"),
+         "Marking that task as done."),
+        ("list", re.compile(r"\b(show|list|display|what are|which)\b"),
+         "Here is the list of your {filter}tasks."),
+        ("create", re.compile(r"\b(create|add|new|remind me|task to)\b"),
+         "I'll create a new task for that."),
+    ]
+    _FALLBACK = "Hello! I can help you manage your tasks."
+    # TaskAgent.process_batch numbers several requests in one prompt
+    _BATCH_MARKER = "User requests:"
+    _NUMBERED_RE = re.compile(r"^(\d+)\. (.*)$", re.MULTILINE)
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, seed: int = 0, **kwargs):
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def invoke(self, messages, **kwargs) -> AIMessage:
+        """Return a canned reply for the last message in ``messages``"""
+        delay = self._next_delay()
+        if delay:
+            time.sleep(delay)
+        return self._reply(messages)
+
+    def batch(self, inputs: List, **kwargs) -> List[AIMessage]:
+        """Answer several prompts, mirroring the LangChain ``Runnable.batch`` API.
+
+        Like the real client, the requests run concurrently, so a batch takes
+        as long as its slowest request rather than the sum of all of them.
+        """
+        delay = max((self._next_delay() for _ in inputs), default=0.0)
+        if delay:
+            time.sleep(delay)
+        return [self._reply(messages) for messages in inputs]
+
+    def _next_delay(self) -> float:
+        with self._lock:
+            self.calls += 1
+            return self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def _reply(self, messages) -> AIMessage:
+        content = self._content(messages)
+        if self._BATCH_MARKER in content:
+            items = self._NUMBERED_RE.findall(content.rsplit(self._BATCH_MARKER, 1)[1])
+            return AIMessage(content="\n".join(f"{n}: {self.reply_for(item)}" for n, item in items))
+        return AIMessage(content=self.reply_for(self._user_request(content)))
+
+    def reply_for(self, user_message: str) -> str:
+        """Map a user request to the reply the fake model gives for it"""
+        text = user_message.lower()
+        # The intent whose keyword appears first wins, so "show completed tasks"
+        # lists while "mark the list task done" completes
+        best = None
+        for intent, pattern, reply in self._INTENTS:
+            match = pattern.search(text)
+            if match and (best is None or match.start() < best[0]):
+                best = (match.start(), intent, reply)
+        if best is None:
+            return self._FALLBACK
+        _, intent, reply = best
+        if intent == "list":
+            return reply.format(filter=self._list_filter(text))
+        return reply
+
+    @staticmethod
+    def _list_filter(text: str) -> str:
+        if "high priority" in text or "urgent" in text:
+            return "high priority "
+        if "completed" in text or "done" in text:
+            return "completed "
+        if "pending" in text:
+            return "pending "
+        return ""
+
+    @staticmethod
+    def _content(messages) -> str:
+        if isinstance(messages, str):
+            return messages
+        last = messages[-1]
+        return getattr(last, "content", last)
+
+    @staticmethod
+    def _user_request(content: str) -> str:
+        # TaskAgent prefixes the system prompt; only the user part is classified
+        marker = "User request:"
+        if marker in content:
+            content = content.rsplit(marker, 1)[1]
+        return content.strip()
@@ -0,0 +1,98 @@
+"""Wire size and end-to-end time of a large ``GET /tasks`` for each encoding.
+
+    python -m benchmarks.payloads --tasks 10000
+
+End-to-end time runs from sending the request to having decoded Python
+objects, so it includes server encoding, transfer and client parsing.
+"""
+import argparse
+import gzip
+import json
+import os
+import statistics
+import time
+
+VARIANTS = {
+    "json": ("application/json", "identity"),
+    "json+gzip": ("application/json", "gzip"),
+    "json+br": ("application/json", "br"),
+    "msgpack": ("application/msgpack", "identity"),
+    "msgpack+gzip": ("application/msgpack", "gzip"),
+    "msgpack+br": ("application/msgpack", "br"),
+}
+
+
+def _decode(raw: bytes, content_type: str, coding: str):
+    import brotli
+    import msgpack
+
+    if coding == "gzip":
+        raw = gzip.decompress(raw)
+    elif coding == "br":
+        raw = brotli.decompress(raw)
+    if content_type.startswith("application/msgpack"):
+        return msgpack.unpackb(raw)
+    return json.loads(raw)
+
+
+def _fetch(client, limit: int, accept: str, coding: str):
+    started = time.perf_counter()
+    with client.stream("GET", "/tasks", params={"limit": limit},
+                       headers={"Accept": accept, "Accept-Encoding": coding}) as response:
+        raw = b"".join(response.iter_raw())
+    content_type = response.headers.get("content-type", "")
+    served_coding = response.headers.get("content-encoding", "identity")
+    rows = _decode(raw, content_type, served_coding)
+    return time.perf_counter() - started, len(raw), len(rows), content_type.split(";")[0], served_coding
+
+
+def run(tasks: int = 10_000, repeat: int = 10, database_url: str = "sqlite:///./payloads.db",
+        seed: int = 42, reset: bool = False) -> dict:
+    # The app reads its settings at import time, so configure it first
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+    # Keep every seeded row in the hot table and the server otherwise idle
+    os.environ["ARCHIVE_ENABLED"] = "false"
+    os.environ["PREWARM_AGENT"] = "false"
+
+    import httpx
+
+    from app import main
+    from app.database.connection import engine
+    from benchmarks.dataset import seed_database
+    from benchmarks.runner import serve_in_thread
+
+    try:
+        seed_database(engine, tasks, seed=seed, reset=reset)
+    except RuntimeError as e:
+        raise SystemExit(str(e))
+    results = {}
+    with serve_in_thread(main.app) as base_url, httpx.Client(base_url=base_url, timeout=120.0) as client:
+        for name, (accept, coding) in VARIANTS.items():
+            _fetch(client, tasks, accept, coding)  # warm up
+            samples = [_fetch(client, tasks, accept, coding) for _ in range(repeat)]
+            times = [sample[0] for sample in samples]
+            _, wire_bytes, rows, served_type, served_coding = samples[-1]
+            results[name] = {
+                "served": f"{served_type}, {served_coding}",
+                "rows": rows,
+                "bytes": wire_bytes,
+                "p50_ms": round(statistics.median(times) * 1000, 2),
+                "min_ms": round(min(times) * 1000, 2),
+            }
+    return {"tasks": tasks, "repeat": repeat, "variants": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.payloads")
+    parser.add_argument("--tasks", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--database-url", default="sqlite:///./payloads.db")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="delete existing tasks before seeding")
+    args = parser.parse_args()
+    print(json.dumps(run(args.tasks, args.repeat, args.database_url, args.seed, args.reset), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import argparse
+import json
+import os
+import platform
+import socket
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+DEFAULT_DATABASE_URL = "sqlite:///./benchmark.db"
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Offline load test for the task API using a fake LLM",
+    )
+    parser.add_argument("--database-url", default=os.environ.get("BENCHMARK_DATABASE_URL", DEFAULT_DATABASE_URL),
+                        help="SQLite or local PostgreSQL DSN to benchmark against")
+    parser.add_argument("--tasks", type=int, default=10_000, help="rows to seed (10k to 1M)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the rows already in the database")
+    parser.add_argument("--reset", action="store_true", help="delete existing tasks before seeding")
+    parser.add_argument("--scenarios", default="crud,writes,filters,chat,chat_batch,ws",
+                        help="comma separated subset of crud, writes, filters, chat, chat_batch, ws")
+    parser.add_argument("--requests", type=int, default=200, help="iterations per REST scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="client threads per REST scenario")
+    parser.add_argument("--batch-size", type=int, default=50, help="messages per POST /chat/batch")
+    parser.add_argument("--ws-clients", type=int, default=50, help="concurrent WebSocket connections")
+    parser.add_argument("--ws-messages", type=int, default=5, help="chat messages per WebSocket")
+    parser.add_argument("--ws-broadcasts", type=int, default=20, help="broadcast fan-out probes")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="simulated LLM round trip")
+    parser.add_argument("--llm-jitter-ms", type=float, default=0.0, help="random extra LLM latency")
+    parser.add_argument("--admission", action="store_true",
+                        help="keep rate limiting and agent admission control on (off by default)")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="previous JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="allowed relative p95/p99/throughput regression vs the baseline")
+    return parser.parse_args(argv)
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def serve_in_thread(app, host: str = "127.0.0.1", port: Optional[int] = None):
+    """Run ``app`` under uvicorn in a background thread and yield its base URL"""
+    import uvicorn
+
+    port = port or _free_port()
+    config = uvicorn.Config(app, host=host, port=port, log_level="warning", ws="websockets")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 30
+    while not server.started:
+        if not thread.is_alive() or time.monotonic() > deadline:
+            raise RuntimeError("Benchmark server failed to start")
+        time.sleep(0.05)
+    try:
+        yield f"http://{host}:{port}"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    # The app reads its settings at import time, so configure it first
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+    # One benchmark client would otherwise be throttled like a single abusive user
+    os.environ["ADMISSION_ENABLED"] = "true" if args.admission else "false"
+    # The seeded data has old completed tasks; archiving them mid-run skews results
+    os.environ["ARCHIVE_ENABLED"] = "false"
+
+    from app import main
+    from app.agents.task_agent import TaskAgent
+    from app.database.connection import engine
+    from benchmarks.dataset import seed_database
+    from benchmarks.fake_llm import FakeChatGoogleGenerativeAI
+    from benchmarks.scenarios import SCENARIOS
+
+    fake_llm = FakeChatGoogleGenerativeAI(
+        latency=args.llm_latency_ms / 1000.0,
+        jitter=args.llm_jitter_ms / 1000.0,
+        seed=args.seed,
+    )
+    main.task_agent = TaskAgent(None, llm=fake_llm)
+
+    seeded = None
+    if not args.skip_seed:
+        started = time.perf_counter()
+        try:
+            seed_database(engine, args.tasks, seed=args.seed, reset=args.reset)
+        except RuntimeError as e:
+            raise SystemExit(str(e))
+        seeded = round(time.perf_counter() - started, 3)
+
+    selected = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(selected) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = {}
+    with serve_in_thread(main.app) as base_url:
+        for name in selected:
+            if name == "ws":
+                results[name] = SCENARIOS[name](
+                    base_url, clients=args.ws_clients, messages_per_client=args.ws_messages,
+                    broadcasts=args.ws_broadcasts, seed=args.seed,
+                )
+            elif name == "chat_batch":
+                results[name] = SCENARIOS[name](
+                    base_url, iterations=args.requests, concurrency=args.concurrency, seed=args.seed,
+                    batch_size=args.batch_size,
+                )
+            else:
+                results[name] = SCENARIOS[name](
+                    base_url, iterations=args.requests, concurrency=args.concurrency, seed=args.seed,
+                )
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": engine.dialect.name,
+            "tasks": args.tasks,
+            "seed": args.seed,
+            "seed_time_s": seeded,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "batch_size": args.batch_size,
+            "ws_clients": args.ws_clients,
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_jitter_ms": args.llm_jitter_ms,
+            "llm_calls": fake_llm.calls,
+            "admission": args.admission,
+        },
+        "scenarios": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from benchmarks.stats import compare
+
+    args = parse_args(argv)
+    report = run(args)
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(payload + "\n")
+    else:
+        print(payload)
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            regressions = compare(json.load(fh), report, args.max_regression)
+        if regressions:
+            print("Performance regressions detected:", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            return 1
+    return 0
@@ -0,0 +1,237 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+import httpx
+import websockets
+
+from app.models.task import TaskStatus, TaskPriority
+from benchmarks.dataset import generate_chat_messages
+from benchmarks.stats import LatencyRecorder
+
+
+def _timed(recorder: LatencyRecorder, call: Callable[[], httpx.Response]) -> httpx.Response:
+    started = time.perf_counter()
+    try:
+        response = call()
+    except httpx.HTTPError:
+        recorder.record(time.perf_counter() - started, ok=False)
+        return None
+    recorder.record(time.perf_counter() - started, ok=response.status_code < 400)
+    return response
+
+
+def _run_workers(base_url: str, iterations: int, concurrency: int,
+                 recorders: Dict[str, LatencyRecorder], work: Callable[[httpx.Client, int], None]):
+    """Run ``work(client, i)`` for ``i`` in ``range(iterations)`` across ``concurrency`` threads"""
+    local = threading.local()
+    clients: List[httpx.Client] = []
+    clients_lock = threading.Lock()
+
+    def client() -> httpx.Client:
+        if not hasattr(local, "client"):
+            local.client = httpx.Client(base_url=base_url, timeout=60.0)
+            with clients_lock:
+                clients.append(local.client)
+        return local.client
+
+    for recorder in recorders.values():
+        recorder.start()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(lambda i: work(client(), i), range(iterations)))
+    finally:
+        for recorder in recorders.values():
+            recorder.stop()
+        for c in clients:
+            c.close()
+    return {name: recorder.summary() for name, recorder in recorders.items()}
+
+
+def run_crud(base_url: str, iterations: int = 200, concurrency: int = 8, seed: int = 42) -> Dict[str, Any]:
+    """Create, read, update and delete one task per iteration"""
+    recorders = {step: LatencyRecorder() for step in ("create", "read", "update", "delete")}
+    priorities = [p.value for p in TaskPriority]
+
+    def work(client: httpx.Client, i: int):
+        rng = random.Random(seed + i)
+        response = _timed(recorders["create"], lambda: client.post("/tasks", json={
+            "title": f"Benchmark task {i}",
+            "description": "Created by the CRUD scenario",
+            "priority": rng.choice(priorities),
+        }))
+        if response is None or response.status_code >= 400:
+            return
+        task_id = response.json()["id"]
+        _timed(recorders["read"], lambda: client.get(f"/tasks/{task_id}"))
+        _timed(recorders["update"], lambda: client.put(f"/tasks/{task_id}", json={"status": "completed"}))
+        _timed(recorders["delete"], lambda: client.delete(f"/tasks/{task_id}"))
+
+    return _run_workers(base_url, iterations, concurrency, recorders, work)
+
+
+def run_writes(base_url: str, iterations: int = 200, concurrency: int = 8, seed: int = 42,
+               hot_tasks: int = 8) -> Dict[str, Any]:
+    """Versioned updates racing on a few hot tasks; ``update`` errors are 409 conflicts"""
+    recorders = {step: LatencyRecorder() for step in ("update", "retry")}
+    statuses = [s.value for s in TaskStatus]
+    versions: Dict[int, int] = {}
+    versions_lock = threading.Lock()
+
+    with httpx.Client(base_url=base_url, timeout=60.0) as setup:
+        for n in range(hot_tasks):
+            task = setup.post("/tasks", json={"title": f"Hot benchmark task {n}"}).json()
+            versions[task["id"]] = task["version"]
+    task_ids = sorted(versions)
+
+    def work(client: httpx.Client, i: int):
+        rng = random.Random(seed + i)
+        task_id = task_ids[i % len(task_ids)]
+        body = {"status": rng.choice(statuses)}
+        with versions_lock:
+            body["version"] = versions[task_id]
+        response = _timed(recorders["update"], lambda: client.put(f"/tasks/{task_id}", json=body))
+        if response is not None and response.status_code == 409:
+            # Someone else won: reload and retry once, as a client would
+            body["version"] = client.get(f"/tasks/{task_id}").json()["version"]
+            response = _timed(recorders["retry"], lambda: client.put(f"/tasks/{task_id}", json=body))
+        if response is not None and response.status_code == 200:
+            with versions_lock:
+                versions[task_id] = max(versions[task_id], response.json()["version"])
+
+    try:
+        return _run_workers(base_url, iterations, concurrency, recorders, work)
+    finally:
+        with httpx.Client(base_url=base_url, timeout=60.0) as cleanup:
+            for task_id in task_ids:
+                cleanup.delete(f"/tasks/{task_id}")
+
+
+def run_filters(base_url: str, iterations: int = 200, concurrency: int = 8, seed: int = 42,
+                page_size: int = 100) -> Dict[str, Any]:
+    """Exercise the paginated list and the priority/status filter routes"""
+    recorders = {step: LatencyRecorder() for step in ("list", "by_priority", "by_status")}
+    priorities = [p.value for p in TaskPriority]
+    statuses = [s.value for s in TaskStatus]
+
+    def work(client: httpx.Client, i: int):
+        rng = random.Random(seed + i)
+        _timed(recorders["list"], lambda: client.get("/tasks", params={
+            "skip": rng.randint(0, 10) * page_size, "limit": page_size,
+        }))
+        _timed(recorders["by_priority"], lambda: client.get(f"/tasks/filter/priority/{rng.choice(priorities)}"))
+        _timed(recorders["by_status"], lambda: client.get(f"/tasks/filter/status/{rng.choice(statuses)}"))
+
+    return _run_workers(base_url, iterations, concurrency, recorders, work)
+
+
+def run_chat(base_url: str, iterations: int = 200, concurrency: int = 8, seed: int = 42) -> Dict[str, Any]:
+    """Send seeded natural-language commands to ``POST /chat``"""
+    recorders = {"chat": LatencyRecorder()}
+    messages = generate_chat_messages(iterations, seed)
+
+    def work(client: httpx.Client, i: int):
+        _timed(recorders["chat"], lambda: client.post("/chat", json={"message": messages[i]}))
+
+    return _run_workers(base_url, iterations, concurrency, recorders, work)
+
+
+def run_chat_batch(base_url: str, iterations: int = 200, concurrency: int = 8, seed: int = 42,
+                   batch_size: int = 50) -> Dict[str, Any]:
+    """Send the same commands as ``run_chat`` to ``POST /chat/batch``, ``batch_size`` at a time"""
+    recorders = {"batch": LatencyRecorder()}
+    messages = generate_chat_messages(iterations, seed)
+    batches = [messages[i:i + batch_size] for i in range(0, len(messages), batch_size)]
+
+    def work(client: httpx.Client, i: int):
+        _timed(recorders["batch"], lambda: client.post("/chat/batch", json={"messages": batches[i]}))
+
+    summaries = _run_workers(base_url, len(batches), concurrency, recorders, work)
+    elapsed = summaries["batch"]["elapsed_s"]
+    summaries["batch"]["messages_per_s"] = round(len(messages) / elapsed, 2) if elapsed else 0.0
+    return summaries
+
+
+async def _receive_until(ws, message_type: str) -> Dict[str, Any]:
+    while True:
+        message = json.loads(await ws.recv())
+        if message.get("type") in (message_type, "error"):
+            return message
+
+
+async def _run_websockets(ws_url: str, clients: int, messages_per_client: int,
+                          broadcasts: int, seed: int) -> Dict[str, Any]:
+    replies = LatencyRecorder()
+    fanout = LatencyRecorder()
+    connect = LatencyRecorder()
+    messages = generate_chat_messages(clients * messages_per_client, seed)
+
+    connect.start()
+    sockets = []
+    for _ in range(clients):
+        started = time.perf_counter()
+        # Large queue so broadcasts to idle sockets never apply backpressure
+        sockets.append(await websockets.connect(ws_url, max_queue=None, open_timeout=30))
+        connect.record(time.perf_counter() - started)
+    connect.stop()
+
+    try:
+        # Phase 1: every socket chats concurrently, one outstanding message each
+        async def chat(index: int, ws):
+            for n in range(messages_per_client):
+                text = messages[index * messages_per_client + n]
+                started = time.perf_counter()
+                await ws.send(json.dumps({"type": "chat", "message": text}))
+                reply = await _receive_until(ws, "agent_response")
+                replies.record(time.perf_counter() - started, ok=reply.get("type") != "error")
+
+        replies.start()
+        await asyncio.gather(*(chat(i, ws) for i, ws in enumerate(sockets)))
+        replies.stop()
+
+        # Drain broadcasts triggered by phase 1 before timing fan-out
+        await asyncio.sleep(0.2)
+        for ws in sockets:
+            while True:
+                try:
+                    await asyncio.wait_for(ws.recv(), timeout=0.01)
+                except asyncio.TimeoutError:
+                    break
+
+        # Phase 2: one writer, time until every socket has seen the change event
+        fanout.start()
+        for n in range(broadcasts):
+            started = time.perf_counter()
+            await sockets[0].send(json.dumps({"type": "chat", "message": f"Create a task to broadcast probe {n}"}))
+            await asyncio.gather(*(_receive_until(ws, "tasks_updated") for ws in sockets))
+            fanout.record(time.perf_counter() - started)
+        fanout.stop()
+    finally:
+        await asyncio.gather(*(ws.close() for ws in sockets), return_exceptions=True)
+
+    return {
+        "connect": connect.summary(),
+        "chat_reply": replies.summary(),
+        "broadcast_fanout": fanout.summary(),
+    }
+
+
+def run_websockets(base_url: str, clients: int = 50, messages_per_client: int = 5,
+                   broadcasts: int = 20, seed: int = 42) -> Dict[str, Any]:
+    """Hold ``clients`` concurrent ``/ws`` connections, chat on all of them and time broadcast fan-out"""
+    ws_url = base_url.replace("http://", "ws://").replace("https://", "wss://").rstrip("/") + "/ws"
+    return asyncio.run(_run_websockets(ws_url, clients, messages_per_client, broadcasts, seed))
+
+
+SCENARIOS = {
+    "crud": run_crud,
+    "writes": run_writes,
+    "filters": run_filters,
+    "chat": run_chat,
+    "chat_batch": run_chat_batch,
+    "ws": run_websockets,
+}
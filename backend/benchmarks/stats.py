@@ -0,0 +1,74 @@
+import math
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class LatencyRecorder:
+    """Thread-safe collector of per-operation latencies for one scenario step"""
+
+    def __init__(self):
+        self.samples: List[float] = []
+        self.errors = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        self.started_at = time.perf_counter()
+
+    def stop(self):
+        self.finished_at = time.perf_counter()
+
+    def record(self, seconds: float, ok: bool = True):
+        with self._lock:
+            self.samples.append(seconds)
+            if not ok:
+                self.errors += 1
+
+    def summary(self) -> Dict[str, Any]:
+        """Latency percentiles in milliseconds plus throughput in ops/sec"""
+        values = sorted(self.samples)
+        elapsed = 0.0
+        if self.started_at is not None and self.finished_at is not None:
+            elapsed = self.finished_at - self.started_at
+        elif values:
+            elapsed = sum(values)
+        return {
+            "count": len(values),
+            "errors": self.errors,
+            "p50_ms": round(percentile(values, 50) * 1000, 3),
+            "p95_ms": round(percentile(values, 95) * 1000, 3),
+            "p99_ms": round(percentile(values, 99) * 1000, 3),
+            "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+            "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_per_s": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], max_regression: float = 0.2) -> List[str]:
+    """List the metrics in ``current`` that regressed past ``max_regression`` vs ``baseline``"""
+    regressions = []
+    for scenario, steps in current.get("scenarios", {}).items():
+        for step, stats in steps.items():
+            before = baseline.get("scenarios", {}).get(scenario, {}).get(step)
+            if not before:
+                continue
+            for metric in ("p95_ms", "p99_ms"):
+                if before[metric] and stats[metric] > before[metric] * (1 + max_regression):
+                    regressions.append(
+                        f"{scenario}.{step}.{metric}: {before[metric]} -> {stats[metric]}"
+                    )
+            metric = "throughput_per_s"
+            if before[metric] and stats[metric] < before[metric] * (1 - max_regression):
+                regressions.append(f"{scenario}.{step}.{metric}: {before[metric]} -> {stats[metric]}")
+    return regressions
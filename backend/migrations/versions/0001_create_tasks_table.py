@@ -0,0 +1,45 @@
+"""create tasks table
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+TASK_STATUS = sa.Enum("PENDING", "IN_PROGRESS", "COMPLETED", "CANCELLED", name="taskstatus")
+TASK_PRIORITY = sa.Enum("LOW", "MEDIUM", "HIGH", "URGENT", name="taskpriority")
+
+
+def upgrade():
+    # Databases created by the old import-time create_all() already have the
+    # table; adopt them instead of failing
+    if "tasks" in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table(
+        "tasks",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("title", sa.String(length=255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("status", TASK_STATUS, nullable=False),
+        sa.Column("due_date", sa.DateTime(), nullable=True),
+        sa.Column("priority", TASK_PRIORITY, nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_tasks_id", "tasks", ["id"])
+    op.create_index("ix_tasks_title", "tasks", ["title"])
+
+
+def downgrade():
+    op.drop_index("ix_tasks_title", table_name="tasks")
+    op.drop_index("ix_tasks_id", table_name="tasks")
+    op.drop_table("tasks")
+    TASK_STATUS.drop(op.get_bind(), checkfirst=True)
+    TASK_PRIORITY.drop(op.get_bind(), checkfirst=True)
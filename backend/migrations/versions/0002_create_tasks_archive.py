@@ -0,0 +1,47 @@
+"""create tasks_archive table
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+STATUSES = ("PENDING", "IN_PROGRESS", "COMPLETED", "CANCELLED")
+PRIORITIES = ("LOW", "MEDIUM", "HIGH", "URGENT")
+
+
+def _existing_enum(name, values):
+    # The PostgreSQL enum types were created with the tasks table
+    return sa.Enum(*values, name=name).with_variant(
+        postgresql.ENUM(*values, name=name, create_type=False), "postgresql"
+    )
+
+
+def upgrade():
+    op.create_table(
+        "tasks_archive",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("title", sa.String(length=255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("status", _existing_enum("taskstatus", STATUSES), nullable=False),
+        sa.Column("due_date", sa.DateTime(), nullable=True),
+        sa.Column("priority", _existing_enum("taskpriority", PRIORITIES), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("archived_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_tasks_archive_title", "tasks_archive", ["title"])
+    op.create_index("ix_tasks_status_updated_at", "tasks", ["status", "updated_at"])
+
+
+def downgrade():
+    op.drop_index("ix_tasks_status_updated_at", table_name="tasks")
+    op.drop_index("ix_tasks_archive_title", table_name="tasks_archive")
+    op.drop_table("tasks_archive")
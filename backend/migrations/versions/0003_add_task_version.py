@@ -0,0 +1,25 @@
+"""add version column for optimistic concurrency
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ("tasks", "tasks_archive"):
+        with op.batch_alter_table(table) as batch:
+            batch.add_column(sa.Column("version", sa.Integer(), server_default="1", nullable=False))
+
+
+def downgrade():
+    for table in ("tasks_archive", "tasks"):
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column("version")
@@ -0,0 +1,40 @@
+"""never reuse task ids on SQLite
+
+SQLite hands out max(rowid) + 1, so archiving the newest task freed its id
+and the next archive run collided with it in tasks_archive. AUTOINCREMENT
+keeps a high-water mark instead. PostgreSQL sequences never reuse ids, so
+this is SQLite only.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    with op.batch_alter_table("tasks", recreate="always", table_kwargs={"sqlite_autoincrement": True}):
+        pass
+    # Start above every id handed out so far, including archived ones
+    op.execute(
+        "INSERT INTO sqlite_sequence (name, seq) SELECT 'tasks', 0 "
+        "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'tasks')"
+    )
+    op.execute(
+        "UPDATE sqlite_sequence SET seq = MAX(seq, (SELECT COALESCE(MAX(id), 0) FROM tasks_archive)) "
+        "WHERE name = 'tasks'"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    with op.batch_alter_table("tasks", recreate="always", table_kwargs={"sqlite_autoincrement": False}):
+        pass
@@ -0,0 +1,26 @@
+import os
+import tempfile
+
+# Settings are read at import time; default to a throwaway SQLite database
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db"))
+os.environ.setdefault("GOOGLE_API_KEY", "offline-test-key")
+
+import pytest
+
+from app.database.connection import Base, engine
+from app.models.task import Task  # noqa: F401  (registers the table on Base.metadata)
+from benchmarks.fake_llm import FakeChatGoogleGenerativeAI
+
+# Production schemas come from Alembic; the test database is built directly
+Base.metadata.create_all(bind=engine)
+
+
+@pytest.fixture(autouse=True)
+def offline_agent(monkeypatch):
+    """Route every agent call through the deterministic fake LLM"""
+    from app import main
+    from app.agents.task_agent import TaskAgent
+
+    agent = TaskAgent(None, llm=FakeChatGoogleGenerativeAI())
+    monkeypatch.setattr(main, "task_agent", agent)
+    return agent
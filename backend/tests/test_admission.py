@@ -0,0 +1,157 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.admission import AdmissionController, AdmissionRejected, ConcurrencyLimiter, RateLimiter, client_key
+from app.main import app
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_rate_limiter_refills_per_client():
+    clock = FakeClock()
+    limiter = RateLimiter(per_minute=60, burst=2, clock=clock)
+    limiter.check("a")
+    limiter.check("a")
+    with pytest.raises(AdmissionRejected) as exc:
+        limiter.check("a")
+    assert exc.value.reason == "rate_limited"
+    assert exc.value.retry_after_header == "1"
+
+    limiter.check("b")
+    clock.now += 1.0
+    limiter.check("a")
+
+
+def test_rate_limiter_charges_large_costs_in_full():
+    clock = FakeClock()
+    limiter = RateLimiter(per_minute=60, burst=10, clock=clock)
+    # 25 tokens pass on a full bucket but leave 15 to pay back at one per second
+    limiter.check("batch", cost=25)
+    clock.now += 15.0
+    with pytest.raises(AdmissionRejected) as exc:
+        limiter.check("batch")
+    assert exc.value.retry_after == pytest.approx(1.0)
+    clock.now += 1.0
+    limiter.check("batch")
+
+    # Work billed after the fact (LLM retries) is debt too
+    limiter.charge("retries", 12)
+    with pytest.raises(AdmissionRejected) as exc:
+        limiter.check("retries")
+    assert exc.value.retry_after == pytest.approx(3.0)
+
+
+def test_rate_limiter_forgets_least_recent_clients():
+    limiter = RateLimiter(per_minute=60, burst=1, max_clients=2, clock=FakeClock())
+    for key in ("a", "b", "c"):
+        limiter.check(key)
+    # "a" was evicted, so it starts over with a full bucket
+    limiter.check("a")
+    with pytest.raises(AdmissionRejected):
+        limiter.check("c")
+
+
+def test_concurrency_limiter_sheds_when_queue_is_full():
+    async def scenario():
+        limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=1, queue_timeout=1.0)
+        release = asyncio.Event()
+        order = []
+
+        async def hold(name):
+            async with limiter.slot():
+                order.append(name)
+                await release.wait()
+
+        first = asyncio.create_task(hold("first"))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(hold("second"))
+        await asyncio.sleep(0)
+        assert limiter.in_flight == 1 and limiter.waiting == 1
+
+        with pytest.raises(AdmissionRejected) as exc:
+            async with limiter.slot():
+                pass
+        assert exc.value.reason == "overloaded"
+
+        release.set()
+        await asyncio.gather(first, second)
+        assert order == ["first", "second"]
+        assert limiter.in_flight == 0 and limiter.waiting == 0
+
+    asyncio.run(scenario())
+
+
+def test_concurrency_limiter_times_out_queued_requests():
+    async def scenario():
+        limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=5, queue_timeout=0.05)
+        release = asyncio.Event()
+
+        async def hold():
+            async with limiter.slot():
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected):
+            async with limiter.slot():
+                pass
+        assert limiter.waiting == 0
+
+        release.set()
+        await holder
+        async with limiter.slot():
+            assert limiter.in_flight == 1
+
+    asyncio.run(scenario())
+
+
+def test_client_key_prefers_known_api_keys():
+    class Client:
+        host = "10.0.0.1"
+
+    assert client_key({"x-api-key": "k"}, Client(), api_keys={"k"}) == "key:k"
+    assert client_key({"x-api-key": "unknown"}, Client(), api_keys={"k"}) == "ip:10.0.0.1"
+    assert client_key({"x-forwarded-for": "1.2.3.4, 10.0.0.9"}, Client()) == "ip:10.0.0.1"
+    # The leftmost entries are whatever the client sent; the proxy appends the real address
+    assert client_key({"x-forwarded-for": "1.2.3.4, 10.0.0.9"}, Client(), trust_forwarded_for=True) == "ip:10.0.0.9"
+    assert client_key({"x-forwarded-for": "5.6.7.8, 10.0.0.9"}, Client(), trust_forwarded_for=True) == "ip:10.0.0.9"
+
+
+def test_chat_returns_429_with_retry_after(monkeypatch):
+    controller = AdmissionController(per_minute=1, burst=1, max_concurrency=2, max_queue=2, queue_timeout=1.0)
+    monkeypatch.setattr(main, "admission", controller)
+    client = TestClient(app)
+
+    assert client.post("/chat", json={"message": "list my tasks"}).status_code == 200
+    response = client.post("/chat", json={"message": "list my tasks"})
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+
+    # Made-up API keys share the caller's budget; configured ones get their own
+    assert client.post("/chat", json={"message": "list my tasks"}, headers={"X-API-Key": "other"}).status_code == 429
+    monkeypatch.setattr(main.settings, "api_keys", "partner, other")
+    assert client.post("/chat", json={"message": "list my tasks"}, headers={"X-API-Key": "other"}).status_code == 200
+
+
+def test_websocket_reports_overload(monkeypatch):
+    controller = AdmissionController(per_minute=1, burst=1, max_concurrency=2, max_queue=2, queue_timeout=1.0)
+    monkeypatch.setattr(main, "admission", controller)
+    client = TestClient(app)
+
+    with client.websocket_connect("/ws") as websocket:
+        websocket.send_json({"type": "chat", "message": "list my tasks"})
+        assert websocket.receive_json()["type"] == "agent_response"
+        websocket.send_json({"type": "chat", "message": "list my tasks"})
+        reply = websocket.receive_json()
+        assert reply["type"] == "overloaded"
+        assert reply["reason"] == "rate_limited"
+        assert reply["retry_after"] >= 1
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, update
+from sqlalchemy.orm import sessionmaker
+
+from app.database.archive import archive_tasks
+from app.database.connection import Base, SessionLocal, engine
+from app.main import app
+from app.models.task import Task, ArchivedTask, TaskStatus
+from app.tools.task_tools import TaskManager
+
+OLD = datetime.now() - timedelta(days=90)
+
+
+def _add_tasks(session, prefix):
+    session.add_all([
+        Task(title=f"{prefix} old done {n}", status=TaskStatus.COMPLETED, updated_at=OLD) for n in range(5)
+    ] + [
+        Task(title=f"{prefix} old cancelled", status=TaskStatus.CANCELLED, updated_at=OLD),
+        Task(title=f"{prefix} old pending", status=TaskStatus.PENDING, updated_at=OLD),
+        Task(title=f"{prefix} recent done", status=TaskStatus.COMPLETED),
+    ])
+    session.commit()
+
+
+def test_archived_ids_are_not_reused(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'reuse.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([Task(title=f"reuse {n}", status=TaskStatus.COMPLETED, updated_at=OLD) for n in range(2)])
+    session.commit()
+    assert archive_tasks(engine, timedelta(days=30)) == 2
+
+    # The newest task was archived too; its id must not be handed out again
+    task = Task(title="reuse later", status=TaskStatus.COMPLETED, updated_at=OLD)
+    session.add(task)
+    session.commit()
+    assert task.id == 3
+    assert archive_tasks(engine, timedelta(days=30)) == 1
+    assert session.query(ArchivedTask).count() == 3
+    session.close()
+    engine.dispose()
+
+
+def test_tasks_reopened_mid_batch_stay_hot(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'race.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([Task(title=f"race {n}", status=TaskStatus.COMPLETED, updated_at=OLD) for n in range(3)])
+    session.commit()
+    reopened = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def reopen_before_copy(conn, cursor, statement, parameters, context, executemany):
+        # Another client reopens a task between the archiver's SELECT and INSERT
+        if not reopened and statement.startswith("INSERT INTO tasks_archive"):
+            reopened.append(True)
+            with engine.begin() as other:
+                other.execute(update(Task.__table__).where(Task.title == "race 1").values(status=TaskStatus.PENDING))
+
+    assert archive_tasks(engine, timedelta(days=30)) == 2
+    assert reopened
+    assert [(t.title, t.status) for t in session.query(Task)] == [("race 1", TaskStatus.PENDING)]
+    assert {t.title for t in session.query(ArchivedTask)} == {"race 0", "race 2"}
+    session.close()
+    engine.dispose()
+
+
+def test_archive_moves_old_terminal_tasks_in_batches(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'archive.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    _add_tasks(session, "batch")
+    ids = {task.id for task in session.query(Task).filter(Task.title.like("batch old %"))}
+
+    assert archive_tasks(engine, timedelta(days=30), batch_size=2, max_batches=1) == 2
+    assert archive_tasks(engine, timedelta(days=30), batch_size=2) == 4
+    assert archive_tasks(engine, timedelta(days=30), batch_size=2) == 0
+
+    assert {t.title for t in session.query(Task)} == {"batch old pending", "batch recent done"}
+    archived = session.query(ArchivedTask).all()
+    assert {t.id for t in archived} == ids - {t.id for t in session.query(Task)}
+    assert all(t.archived_at is not None for t in archived)
+
+    manager = TaskManager(session)
+    assert len(manager.list_tasks()["tasks"]) == 2
+    assert len(manager.list_tasks(include_archived=True)["tasks"]) == 8
+    assert len(manager.filter_tasks(status="cancelled", include_archived=True)["tasks"]) == 1
+    session.close()
+    engine.dispose()
+
+
+def test_archived_tasks_are_opt_in_on_routes():
+    session = SessionLocal()
+    _add_tasks(session, "route")
+    session.close()
+    archive_tasks(engine, timedelta(days=30))
+
+    client = TestClient(app)
+
+    def titles(response):
+        return {task["title"] for task in response.json() if task["title"].startswith("route")}
+
+    assert titles(client.get("/tasks/filter/status/cancelled")) == set()
+    assert titles(client.get("/tasks/filter/status/cancelled", params={"include_archived": True})) == {
+        "route old cancelled"
+    }
+    assert len(titles(client.get("/tasks", params={"include_archived": True, "limit": 1000}))) == 8
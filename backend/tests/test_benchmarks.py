@@ -0,0 +1,65 @@
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.agents.task_agent import TaskAgent
+from app.models.task import Task
+from benchmarks.dataset import generate_chat_messages, generate_tasks, seed_database
+from benchmarks.fake_llm import FakeChatGoogleGenerativeAI
+from benchmarks.stats import LatencyRecorder, compare, percentile
+
+
+@pytest.fixture
+def db_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bench.db'}")
+    yield engine
+    engine.dispose()
+
+
+def test_fake_llm_steers_agent_branches(db_engine):
+    """The fake model's replies drive TaskAgent into the intended branch"""
+    seed_database(db_engine, 0)
+    db = sessionmaker(bind=db_engine)()
+    agent = TaskAgent(None, llm=FakeChatGoogleGenerativeAI())
+
+    created = agent.process_message("Create a task to buy milk", db)
+    assert created["tasks_updated"] is True
+    listed = agent.process_message("Show me my tasks", db)
+    assert "buy milk" in listed["response"]
+    done = agent.process_message("Mark the task to buy milk", db)
+    assert done["tasks_updated"] is True
+    greeting = agent.process_message("Hello there", db)
+    assert greeting["tasks_updated"] is False
+    assert agent.llm.calls == 4
+    db.close()
+
+
+def test_dataset_is_reproducible(db_engine):
+    assert list(generate_tasks(50, seed=7)) == list(generate_tasks(50, seed=7))
+    assert list(generate_tasks(50, seed=7)) != list(generate_tasks(50, seed=8))
+    assert generate_chat_messages(20, seed=7) == generate_chat_messages(20, seed=7)
+
+    assert seed_database(db_engine, 1234, batch_size=500) == 1234
+    with db_engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(Task.__table__)).scalar() == 1234
+
+    # Existing tasks are only deleted when asked to
+    with pytest.raises(RuntimeError, match="already has 1234 tasks"):
+        seed_database(db_engine, 10)
+    assert seed_database(db_engine, 10, reset=True) == 10
+
+
+def test_latency_summary_and_regression_check():
+    assert percentile([0.1, 0.2, 0.3, 0.4], 50) == 0.2
+    assert percentile([], 99) == 0.0
+
+    recorder = LatencyRecorder()
+    for ms in range(1, 101):
+        recorder.record(ms / 1000.0)
+    summary = recorder.summary()
+    assert (summary["p50_ms"], summary["p95_ms"], summary["p99_ms"]) == (50.0, 95.0, 99.0)
+
+    baseline = {"scenarios": {"crud": {"create": summary}}}
+    slower = dict(summary, p95_ms=summary["p95_ms"] * 2)
+    assert compare(baseline, baseline) == []
+    assert compare(baseline, {"scenarios": {"crud": {"create": slower}}}) == ["crud.create.p95_ms: 95.0 -> 190.0"]
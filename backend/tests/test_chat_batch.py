@@ -0,0 +1,139 @@
+from fastapi.testclient import TestClient
+from langchain.schema import AIMessage
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import main
+from app.agents.context import ConversationContextStore
+from app.agents.task_agent import TaskAgent
+from app.database.connection import Base, SessionLocal
+from app.main import app
+from app.models.task import Task, TaskStatus
+
+client = TestClient(app)
+
+
+def _titles(prefix):
+    db = SessionLocal()
+    try:
+        return {task.title: task.status for task in db.query(Task).filter(Task.title.like(f"{prefix}%"))}
+    finally:
+        db.close()
+
+
+def test_batch_uses_one_llm_call_per_prompt_and_one_broadcast(offline_agent, monkeypatch):
+    broadcasts = []
+
+    async def broadcast(message):
+        broadcasts.append(message)
+
+    monkeypatch.setattr(main.manager, "broadcast", broadcast)
+    messages = [f'Create a task called "Batch walrus {n}"' for n in range(45)]
+    messages += ["Show me all tasks", "hello there"]
+
+    response = client.post("/chat/batch", json={"messages": messages})
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["results"]) == 47
+    assert body["tasks_updated"] is True
+    assert all(result["tasks_updated"] for result in body["results"][:45])
+    assert body["results"][45]["response"].startswith("Here are your tasks")
+    assert not body["results"][46]["tasks_updated"]
+
+    assert offline_agent.llm.calls == 3  # 47 messages, 20 per prompt
+    assert len(broadcasts) == 1
+    assert len(_titles("Batch walrus")) == 45
+
+
+def test_batch_failures_are_per_message():
+    response = client.post("/chat/batch", json={"messages": [
+        'Create a task called "Batch otter kept"',
+        'Delete the task "no such batch task anywhere"',
+        'Mark "Batch otter kept" as done',
+    ]})
+    results = response.json()["results"]
+    assert results[0]["tasks_updated"] and results[2]["tasks_updated"]
+    assert results[1]["response"] == "Error: Task not found"
+    assert _titles("Batch otter") == {"Batch otter kept": TaskStatus.COMPLETED}
+
+
+def test_batch_resolves_follow_ups_in_order():
+    response = client.post("/chat/batch", json={"session_id": "batch-session", "messages": [
+        'Create a task called "Batch heron"',
+        "mark it done",
+    ]})
+    assert [result["tasks_updated"] for result in response.json()["results"]] == [True, True]
+    assert _titles("Batch heron") == {"Batch heron": TaskStatus.COMPLETED}
+
+
+def test_batch_listings_see_earlier_writes(offline_agent, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'batch.db'}")
+    Base.metadata.create_all(bind=engine)
+    context = ConversationContextStore().get("batch-listing")
+    db = sessionmaker(bind=engine)()
+    try:
+        results = offline_agent.process_batch(
+            ["Show me my tasks", 'Create a task called "Stale kiwi"', "Show me my tasks"], db, context,
+        )
+    finally:
+        db.close()
+        engine.dispose()
+    assert results[0]["response"].startswith("No tasks found")
+    assert "Stale kiwi" in results[2]["response"]
+
+
+def test_batch_makes_no_llm_calls_inside_its_transaction(offline_agent, tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'locks.db'}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    llm = offline_agent.llm
+    in_transaction = []
+    for name in ("invoke", "batch"):
+        def record(*args, _call=getattr(llm, name), **kwargs):
+            in_transaction.append(db.in_transaction())
+            return _call(*args, **kwargs)
+        monkeypatch.setattr(llm, name, record)
+    try:
+        # "delete it" has nothing to refer to, so it falls back to its LLM reply
+        results = offline_agent.process_batch(
+            ["delete it", 'Create a task called "Locked owl"'], db, ConversationContextStore().get("locks"),
+        )
+    finally:
+        db.close()
+        engine.dispose()
+    assert results[1]["tasks_updated"] is True
+    assert in_transaction == [False]
+
+
+def test_batch_size_is_capped(monkeypatch):
+    monkeypatch.setattr(main.settings, "chat_batch_max_messages", 2)
+    assert client.post("/chat/batch", json={"messages": ["a", "b", "c"]}).status_code == 413
+    assert client.post("/chat/batch", json={"messages": []}).status_code == 422
+
+
+class SkippingLLM:
+    """Answers multi-item prompts but leaves out the second item"""
+
+    def __init__(self):
+        self.prompts = []
+
+    def batch(self, inputs):
+        replies = []
+        for messages in inputs:
+            self.prompts.append(messages[0].content)
+            if "User requests:" in messages[0].content:
+                replies.append(AIMessage(content="1: I'll create a new task.\n3. Here is the list."))
+            else:
+                replies.append(AIMessage(content="Marking that task as done."))
+        return replies
+
+
+def test_classify_batch_retries_items_missing_from_the_reply():
+    llm = SkippingLLM()
+    agent = TaskAgent(None, llm=llm)
+    retries = []
+    replies = agent._classify_batch(["add milk", "finish report", "show tasks"], retries.append)
+    assert replies == ["i'll create a new task.", "marking that task as done.", "here is the list."]
+    assert len(llm.prompts) == 2
+    assert llm.prompts[1].endswith("User request: finish report")
+    assert retries == [1]  # billed to the caller's rate limit
@@ -0,0 +1,90 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.agents.context import ConversationContextStore, parse_follow_up
+from app.agents.task_agent import TaskAgent
+from app.database.connection import Base
+from app.models.task import Task, TaskStatus
+from benchmarks.fake_llm import FakeChatGoogleGenerativeAI
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'context.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([Task(title=title) for title in ("Buy milk", "Call mom", "Pay rent")])
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def test_parse_follow_up():
+    assert parse_follow_up("mark the second one done") == ("completed", 2)
+    assert parse_follow_up("delete the last one") == ("delete", -1)
+    assert parse_follow_up("start the 3rd task") == ("in_progress", 3)
+    assert parse_follow_up("actually, remove it") == ("delete", 0)
+    assert parse_follow_up("show me my tasks") is None
+    assert parse_follow_up("remind me to finish it") is None
+    # Questions and negations are not commands
+    assert parse_follow_up("Should I delete it?") is None
+    assert parse_follow_up("Is it done?") is None
+    assert parse_follow_up("is the second one finished") is None
+    assert parse_follow_up("mark it done?") is None
+    assert parse_follow_up("don't delete the first one") is None
+    assert parse_follow_up("do not remove it") is None
+    assert parse_follow_up("it's not done yet") is None
+    # Ordinals inside titles and dates are not list references
+    assert parse_follow_up("Delete the first draft") is None
+    assert parse_follow_up("Mark the report from last week done") is None
+    assert parse_follow_up("Delete the 2nd quarter report") is None
+    assert parse_follow_up("please mark the 2nd task as completed") == ("completed", 2)
+    assert parse_follow_up("ok, set that one to in progress") == ("in_progress", 0)
+
+
+def test_store_is_bounded_lru_and_invalidates():
+    store = ConversationContextStore(max_sessions=2, max_turns=2, max_tasks=2)
+    a = store.get("a")
+    store.get("b")
+    store.get("a")
+    store.get("c")
+    assert "b" not in store and "a" in store and len(store) == 2
+
+    for n in range(5):
+        a.add_turn(f"message {n}", "reply")
+    assert [turn[0] for turn in a.turns] == ["message 3", "message 4"]
+
+    tasks = [{"id": 7, "title": "x"}, {"id": 9, "title": "y"}]
+    a.remember_listing(("all",), tasks)
+    assert a.cached_listing(("all",))[1]["id"] == 9
+    store.invalidate()
+    assert a.cached_listing(("all",)) is None
+    assert a.resolve(2) == 9 and a.resolve(-1) == 9 and a.resolve(3) is None
+
+    a.remember_listing(("all",), tasks + [{"id": 11}])
+    assert a.listed_ids == [7, 9] and a.cached_listing(("all",)) is None
+    assert a.resolve(2) == 9 and a.resolve(-1) is None and a.resolve(3) is None
+
+
+def test_follow_up_skips_llm_and_listing_cache(db):
+    store = ConversationContextStore()
+    context = store.get("session")
+    agent = TaskAgent(None, llm=FakeChatGoogleGenerativeAI())
+
+    listing = agent.process_message("Show me my tasks", db, context)
+    assert agent.llm.calls == 1
+    second_id = context.listed_ids[1]
+
+    result = agent.process_message("mark the second one done", db, context)
+    assert result["tasks_updated"] is True
+    assert agent.llm.calls == 1
+    assert db.get(Task, second_id).status == TaskStatus.COMPLETED
+
+    # Repeated listings are served from the snapshot until a change event
+    db.add(Task(title="Walk dog"))
+    db.commit()
+    assert agent.process_message("Show me my tasks", db, context)["response"] == listing["response"]
+    store.invalidate()
+    assert "Walk dog" in agent.process_message("Show me my tasks", db, context)["response"]
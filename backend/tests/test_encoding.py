@@ -0,0 +1,83 @@
+import asyncio
+import gzip
+import json
+
+import brotli
+import msgpack
+from fastapi.testclient import TestClient
+
+from app.encoding import content_coding, wants_msgpack
+from app import main
+from app.main import app
+
+client = TestClient(app)
+
+
+def _raw_get(path, **headers):
+    """GET without letting the client undo the content coding"""
+    with client.stream("GET", path, params={"limit": 10000}, headers=headers) as response:
+        return response, b"".join(response.iter_raw())
+
+
+def test_negotiation_headers():
+    assert content_coding("gzip, deflate, br") == "br"
+    assert content_coding("gzip, br;q=0.5") == "gzip"
+    assert content_coding("*") == "br"
+    assert content_coding("identity") is None
+    assert content_coding("br;q=0, gzip;q=0") is None
+    assert wants_msgpack("application/msgpack")
+    assert wants_msgpack("application/json;q=0.5, application/msgpack")
+    assert not wants_msgpack("application/json, application/msgpack;q=0.8")
+    assert not wants_msgpack("*/*")
+
+
+def test_large_lists_are_compressed_and_small_ones_are_not():
+    for n in range(40):
+        client.post("/tasks", json={"title": f"Encoding task {n}", "description": "x" * 50})
+    expected = client.get("/tasks", params={"limit": 10000}, headers={"Accept-Encoding": "identity"}).json()
+
+    response, raw = _raw_get("/tasks", **{"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert json.loads(gzip.decompress(raw)) == expected
+    assert len(raw) < len(gzip.decompress(raw))
+
+    response, raw = _raw_get("/tasks", **{"Accept-Encoding": "br, gzip"})
+    assert response.headers["content-encoding"] == "br"
+    assert brotli.decompress(raw) == gzip.decompress(_raw_get("/tasks", **{"Accept-Encoding": "gzip"})[1])
+
+    response, raw = _raw_get("/tasks/filter/priority/nonexistent", **{"Accept-Encoding": "br, gzip"})
+    assert "content-encoding" not in response.headers
+    assert raw == b"[]"
+
+
+def test_msgpack_task_list():
+    json_tasks = client.get("/tasks/filter/status/pending").json()
+    response = client.get("/tasks/filter/status/pending", headers={"Accept": "application/msgpack"})
+    assert response.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content) == json_tasks
+
+
+def test_websocket_binary_frames():
+    with client.websocket_connect("/ws?encoding=msgpack") as websocket:
+        websocket.send_json({"type": "chat", "message": "list my tasks"})
+        reply = msgpack.unpackb(websocket.receive_bytes())
+        assert reply["type"] == "agent_response"
+
+
+def test_encoding_runs_off_the_event_loop(monkeypatch):
+    encode = main.negotiated_response
+    on_loop = []
+
+    def negotiated_response(*args):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return encode(*args)
+
+    monkeypatch.setattr(main, "negotiated_response", negotiated_response)
+    assert client.get("/tasks").status_code == 200
+    assert client.get("/tasks/filter/status/pending").status_code == 200
+    assert on_loop == [False, False]
@@ -0,0 +1,30 @@
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+from app.agents.extractor import Entities, batch_extract, extract
+
+with open(os.path.join(os.path.dirname(__file__), "extractor_corpus.json")) as fh:
+    CORPUS = json.load(fh)
+NOW = datetime.fromisoformat(CORPUS["now"])
+
+
+@pytest.mark.parametrize("case", CORPUS["cases"], ids=lambda case: case["message"])
+def test_labeled_corpus(case):
+    """Every field not labeled in the corpus must be extracted as None"""
+    expected = {field: case.get(field) for field in Entities._fields}
+    if expected["due_date"]:
+        expected["due_date"] = datetime.fromisoformat(expected["due_date"])
+    assert extract(case["message"], NOW)._asdict() == expected
+
+
+def test_priority_needs_whole_words():
+    assert extract("Highlight the budget numbers", NOW).priority is None
+    assert extract("Add a task to follow up, high priority", NOW).priority == "high"
+
+
+def test_batch_extract_matches_single():
+    messages = [case["message"] for case in CORPUS["cases"]]
+    assert batch_extract(messages, NOW) == [extract(message, NOW) for message in messages]
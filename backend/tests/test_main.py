@@ -17,6 +17,14 @@ def test_health():
     assert response.json()["status"] == "healthy"
     assert "timestamp" in response.json()
 
+def test_ready():
+    """Test the readiness endpoint once the app has started"""
+    with TestClient(app) as started_client:
+        response = started_client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ready"
+    assert response.json()["database"] == "ok"
+
 def test_get_tasks():
     """Test getting all tasks"""
     response = client.get("/tasks")
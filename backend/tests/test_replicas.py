@@ -0,0 +1,116 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app.database import connection
+from app.database.connection import Base, make_engine
+from app.database.replicas import ReplicaSet, RoutingSession, replica_lag
+from app.main import app
+from app.models.task import Task
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def databases(tmp_path):
+    primary = make_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    replica = make_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    for engine, title in ((primary, "On the primary"), (replica, "On the replica")):
+        Base.metadata.create_all(bind=engine)
+        with sessionmaker(bind=engine)() as db:
+            db.add(Task(title=title))
+            db.commit()
+    return primary, replica
+
+
+def _titles(db):
+    return [task.title for task in db.query(Task).order_by(Task.id)]
+
+
+def test_reads_use_healthy_replicas_and_writes_pin_the_primary(databases):
+    primary, replica = databases
+    replicas = ReplicaSet([replica])
+    factory = sessionmaker(class_=RoutingSession, bind=primary, replicas=replicas)
+
+    # Replicas only serve reads once a health check passed
+    with factory() as db:
+        assert _titles(db) == ["On the primary"]
+    replicas.check()
+    with factory() as db:
+        assert _titles(db) == ["On the replica"]
+        db.add(Task(title="Written"))
+        db.commit()
+        assert db.wrote
+        assert _titles(db) == ["On the primary", "Written"]
+    with factory() as db:
+        assert _titles(db) == ["On the replica"]
+
+
+def test_clients_read_their_own_writes_for_a_while(databases):
+    primary, replica = databases
+    clock = FakeClock()
+    replicas = ReplicaSet([replica], sticky_seconds=5, clock=clock)
+    replicas.check()
+    factory = sessionmaker(class_=RoutingSession, bind=primary, replicas=replicas)
+
+    with factory(client_key="ip:writer") as db:
+        db.query(Task).filter(Task.title == "On the primary").update({"description": "edited"})
+        db.commit()
+
+    clock.now = 4.0
+    with factory(client_key="ip:writer") as db:
+        assert _titles(db) == ["On the primary"]
+    with factory(client_key="ip:reader") as db:
+        assert _titles(db) == ["On the replica"]
+
+    clock.now = 6.0
+    with factory(client_key="ip:writer") as db:
+        assert _titles(db) == ["On the replica"]
+
+
+def test_lagging_and_unreachable_replicas_are_ejected(databases, tmp_path):
+    primary, replica = databases
+    broken = make_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    lag = {replica: 0.0}
+
+    def probe(engine):
+        return lag[engine] if engine in lag else replica_lag(engine)
+
+    replicas = ReplicaSet([replica, broken], max_lag=5, lag_probe=probe)
+    replicas.check()
+    assert [r["healthy"] for r in replicas.status()] == [True, False]
+    assert replicas.status()[1]["error"]
+    assert {replicas.choose() for _ in range(4)} == {replica}
+
+    lag[replica] = 30.0
+    replicas.check()
+    assert replicas.choose() is None
+    assert replicas.status()[0]["error"] == "lagging 30.0s"
+
+    lag[replica] = 0.5
+    replicas.check()
+    assert replicas.choose() is replica
+
+
+def test_routes_read_from_replicas(databases, monkeypatch):
+    _, replica = databases
+    monkeypatch.setattr(connection.settings, "api_keys", "someone-else")
+    replicas = ReplicaSet([replica])
+    replicas.check()
+    monkeypatch.setattr(connection, "SessionLocal", sessionmaker(
+        class_=RoutingSession, bind=connection.engine, replicas=replicas,
+    ))
+    client = TestClient(app)
+
+    assert [task["title"] for task in client.get("/tasks").json()] == ["On the replica"]
+    created = client.post("/tasks", json={"title": "Routed write"}).json()
+    # The writer sees its task right away; other clients read the replica
+    assert created["id"] in [task["id"] for task in client.get("/tasks", params={"limit": 10000}).json()]
+    other = client.get("/tasks", headers={"X-API-Key": "someone-else"}).json()
+    assert [task["title"] for task in other] == ["On the replica"]
@@ -0,0 +1,93 @@
+from contextlib import contextmanager
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.database.connection import SessionLocal, engine
+from app.main import app
+from app.tools.task_tools import TaskManager
+from benchmarks.runner import serve_in_thread
+from benchmarks.scenarios import run_crud
+
+client = TestClient(app)
+
+
+@contextmanager
+def count_statements():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _create(title):
+    response = client.post("/tasks", json={"title": title})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_update_bumps_version_in_one_statement():
+    task = _create("Versioned task")
+    assert task["version"] == 1
+
+    with count_statements() as statements:
+        response = client.put(f"/tasks/{task['id']}", json={"status": "in_progress", "version": 1})
+    assert response.status_code == 200
+    assert response.json()["status"] == "in_progress"
+    assert response.json()["version"] == 2
+    assert len(statements) == 1 and "RETURNING" in statements[0]
+
+
+def test_stale_update_returns_409_and_keeps_the_winner():
+    task = _create("Contended task")
+    assert client.put(f"/tasks/{task['id']}", json={"title": "First edit", "version": 1}).status_code == 200
+
+    response = client.put(f"/tasks/{task['id']}", json={"title": "Second edit", "version": 1})
+    assert response.status_code == 409
+    assert "version 2" in response.json()["detail"]
+    assert client.get(f"/tasks/{task['id']}").json()["title"] == "First edit"
+
+    # Unversioned writes still go through
+    assert client.put(f"/tasks/{task['id']}", json={"title": "Forced"}).json()["version"] == 3
+
+
+def test_versioned_delete():
+    task = _create("Delete me")
+    assert client.delete(f"/tasks/{task['id']}", params={"version": 5}).status_code == 409
+    assert client.delete(f"/tasks/{task['id']}", params={"version": 1}).status_code == 200
+    assert client.delete(f"/tasks/{task['id']}", params={"version": 1}).status_code == 404
+    assert client.put(f"/tasks/{task['id']}", json={"title": "Gone"}).status_code == 404
+
+
+def test_task_manager_writes_by_title_match():
+    task = _create("Quarterly zebra report")
+    db = SessionLocal()
+    try:
+        manager = TaskManager(db)
+        result = manager.update_task(title_match="zebra report", status="completed")
+        assert result["success"] and result["task"] == {
+            "id": task["id"], "title": "Quarterly zebra report", "description": None,
+            "status": "completed", "priority": "medium", "due_date": None,
+        }
+        assert manager.update_task(task_id=task["id"], version=99)["success"]
+        assert client.get(f"/tasks/{task['id']}").json()["version"] == 3
+
+        assert manager.delete_task(title_match="zebra report")["success"]
+        assert manager.delete_task(title_match="zebra report")["message"] == "Task not found"
+    finally:
+        db.close()
+
+
+def test_concurrent_rest_writes_on_sqlite():
+    """Overlapping CRUD requests must not lock each other out of the database"""
+    with serve_in_thread(app) as base_url:
+        results = run_crud(base_url, iterations=40, concurrency=8)
+    assert {step: result["errors"] for step, result in results.items()} == {
+        "create": 0, "read": 0, "update": 0, "delete": 0,
+    }
@@ -57,6 +57,11 @@ export default function HomePage() {
             setIsLoading(false);
           }
           break;
+
+        case 'overloaded':
+          toast.error(`${lastMessage.message} Try again in ${lastMessage.retry_after}s.`);
+          setIsLoading(false);
+          break;
       }
     }
   }, [lastMessage, fetchTasks]);
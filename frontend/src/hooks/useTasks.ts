@@ -40,12 +40,18 @@ export const useTasks = () => {
         task.id === id ? response.data : task
       ));
       return response.data;
-    } catch (err) {
-      setError('Failed to update task');
+    } catch (err: any) {
+      if (err?.response?.status === 409) {
+        // Someone else changed the task first; show their version
+        setError('Task was changed elsewhere, please try again');
+        fetchTasks();
+      } else {
+        setError('Failed to update task');
+      }
       console.error('Error updating task:', err);
       throw err;
     }
-  }, []);
+  }, [fetchTasks]);
 
   const deleteTask = useCallback(async (id: number) => {
     try {
@@ -60,8 +66,9 @@ export const useTasks = () => {
 
   const toggleTaskStatus = useCallback(async (id: number, currentStatus: string) => {
     const newStatus = currentStatus === 'completed' ? 'pending' : 'completed';
-    return updateTask(id, { status: newStatus as any });
-  }, [updateTask]);
+    const version = tasks.find(task => task.id === id)?.version;
+    return updateTask(id, { status: newStatus as any, version });
+  }, [tasks, updateTask]);
 
   useEffect(() => {
     fetchTasks();
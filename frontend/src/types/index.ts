@@ -7,6 +7,7 @@ export interface Task {
   priority: TaskPriority;
   created_at: string;
   updated_at: string;
+  version: number;
 }
 
 export enum TaskStatus {
@@ -31,10 +32,12 @@ export interface ChatMessage {
 }
 
 export interface WebSocketMessage {
-  type: 'chat' | 'agent_response' | 'tasks_updated' | 'error';
+  type: 'chat' | 'agent_response' | 'tasks_updated' | 'error' | 'overloaded';
   message?: string;
   response?: string;
   tasks_updated?: boolean;
+  reason?: 'rate_limited' | 'overloaded';
+  retry_after?: number;
   timestamp: string;
 }
 
@@ -51,6 +54,7 @@ export interface TaskUpdateRequest {
   status?: TaskStatus;
   due_date?: string;
   priority?: TaskPriority;
+  version?: number;
 }
 
 